@@ -0,0 +1,7 @@
+from .errors import AuthError
+from .authenticator import Authenticator
+from .jwks import JWKSKeyStore, JWKSUnavailable
+from .permissions import PermissionRule
+from .token_cache import TokenCache
+from .verifiers import (Verifier, JWKSVerifier, RemoteJWKSVerifier,
+                        StaticKeyVerifier, SharedSecretVerifier)
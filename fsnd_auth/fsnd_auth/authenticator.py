@@ -0,0 +1,126 @@
+from functools import wraps
+
+from flask import request
+
+from .errors import AuthError
+from .permissions import PermissionRule
+from .token_cache import TokenCache
+
+
+'''
+Authenticator
+    the Flask side of auth: reads the bearer token, verifies it with the
+    verifier it was built with, checks permissions and provides the
+    requires_auth decorator
+
+    Verified tokens are kept in a TokenCache together with the frozenset of
+    their permissions, so a client reusing its token is verified once.
+    EXAMPLE
+        auth = Authenticator(RemoteJWKSVerifier('tenant.auth0.com', 'coffee'))
+
+        @app.route('/drinks-detail')
+        @auth.requires_auth('get:drinks-detail')
+        def drinks_detail(payload):
+            ...
+'''
+
+
+class Authenticator(object):
+
+    def __init__(self, verifier, tokens=None):
+        self.verifier = verifier
+        self.tokens = tokens if tokens is not None else TokenCache()
+
+    def get_token_auth_header(self):
+        """Obtains the Access Token from the Authorization Header
+        """
+        auth = request.headers.get('Authorization', None)
+        if not auth:
+            raise AuthError({
+                'code': 'authorization_header_missing',
+                'description': 'Authorization header is expected.'
+            }, 401)
+
+        parts = auth.split()
+        if parts[0].lower() != 'bearer':
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Authorization header must start with "Bearer".'
+            }, 401)
+
+        elif len(parts) == 1:
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Token not found.'
+            }, 401)
+
+        elif len(parts) > 2:
+            raise AuthError({
+                'code': 'invalid_header',
+                'description': 'Authorization header must be bearer token.'
+            }, 401)
+
+        token = parts[1]
+        return token
+
+    def verify_token(self, token):
+        # returns the payload and the frozenset of its permissions (None
+        # when the claim is missing), served from the cache until the token
+        # expires
+        verified = self.tokens.get(token)
+        if verified is not None:
+            return verified
+
+        payload = self.verifier.verify(token)
+        permissions = None
+        if isinstance(payload.get('permissions'), list):
+            permissions = frozenset(payload['permissions'])
+        verified = (payload, permissions)
+        self.tokens.put(token, verified, exp=payload.get('exp'))
+        return verified
+
+    def verify_decode_jwt(self, token):
+        return self.verify_token(token)[0]
+
+    @staticmethod
+    def permission_set(payload):
+        if 'permissions' not in payload:
+            raise AuthError({
+                'code': 'invalid_claims',
+                'description': 'Permissions not included in JWT.'
+            }, 400)
+
+        return frozenset(payload['permissions'])
+
+    # permission can also be a PermissionRule, and permissions the frozenset
+    # of the payload's permissions when the caller already has it
+    def check_permissions(self, permission, payload, permissions=None):
+        if permissions is None:
+            permissions = self.permission_set(payload)
+        if not isinstance(permission, PermissionRule):
+            permission = PermissionRule(permission)
+
+        if not permission.allows(permissions):
+            raise AuthError({
+                'code': 'unauthorized',
+                'description': 'Permission not found.'
+            }, 403)
+        return True
+
+    # permission, and every one of all_of, is required. With any_of at least
+    # one of those is required too, e.g.
+    #     @auth.requires_auth(any_of=['patch:drinks', 'delete:drinks'])
+    def requires_auth(self, permission='', any_of=None, all_of=None):
+        # compiled once here, not per request
+        rule = PermissionRule(permission, any_of=any_of, all_of=all_of)
+
+        def requires_auth_decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                token = self.get_token_auth_header()
+                payload, permissions = self.verify_token(token)
+                self.check_permissions(rule, payload, permissions)
+                return f(payload, *args, **kwargs)
+
+            return wrapper
+        return requires_auth_decorator
@@ -0,0 +1,103 @@
+import json
+import threading
+import time
+from urllib.request import urlopen
+
+
+'''
+JWKSKeyStore
+    keeps the signing keys of a JSON Web Key Set in a dict keyed by kid
+
+    The set is fetched once and then served from memory. Once it is older
+    than ttl seconds the next lookup still answers from the cached keys
+    while a background thread fetches a fresh copy (stale-while-revalidate),
+    so a slow identity provider never holds up a request. A kid that is not
+    in the cache triggers one synchronous refetch, at most once every
+    min_refetch_interval seconds, to pick up rotated keys without letting
+    tokens with made up kids hammer the provider. If a fetch fails the
+    previous keys keep being served.
+
+    url can be anything urlopen understands, a file:// URL or a local stub
+    server works for tests.
+    EXAMPLE
+        keys = JWKSKeyStore('https://example.auth0.com/.well-known/jwks.json')
+        rsa_key = keys.get(unverified_header['kid'])
+'''
+
+
+class JWKSUnavailable(Exception):
+    pass
+
+
+class JWKSKeyStore(object):
+
+    def __init__(self, url, ttl=600, min_refetch_interval=30, timeout=5):
+        self.url = url
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.keys = None
+        self.fetched_at = 0
+        self.attempted_at = 0
+        self.refreshing = False
+
+    def _fetch(self):
+        with urlopen(self.url, timeout=self.timeout) as response:
+            jwks = json.loads(response.read())
+        return {
+            key['kid']: {
+                'kty': key['kty'],
+                'kid': key['kid'],
+                'use': key.get('use'),
+                'n': key['n'],
+                'e': key['e']
+            }
+            for key in jwks['keys'] if 'kid' in key and key.get('kty') == 'RSA'
+        }
+
+    def refresh(self):
+        # fetches the set now, returns False and keeps the old keys when
+        # the provider can not be reached
+        self.attempted_at = time.monotonic()
+        try:
+            keys = self._fetch()
+        except (OSError, ValueError, KeyError):
+            return False
+        with self.lock:
+            self.keys = keys
+            self.fetched_at = time.monotonic()
+        return True
+
+    def _refresh_in_background(self):
+        with self.lock:
+            if self.refreshing:
+                return
+            self.refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self.lock:
+                    self.refreshing = False
+
+        threading.Thread(target=run, name='jwks-refresh', daemon=True).start()
+
+    def get(self, kid):
+        # the key for kid, None when the provider does not know it. Raises
+        # JWKSUnavailable when no key set could ever be fetched.
+        if self.keys is None and not self.refresh():
+            raise JWKSUnavailable(self.url)
+
+        now = time.monotonic()
+        if now - self.fetched_at >= self.ttl and \
+                now - self.attempted_at >= self.min_refetch_interval:
+            self._refresh_in_background()
+
+        key = self.keys.get(kid)
+        if key is None and \
+                time.monotonic() - self.attempted_at >= self.min_refetch_interval:
+            self.refresh()
+            key = self.keys.get(kid)
+        return key
@@ -0,0 +1,31 @@
+'''
+PermissionRule
+    the permissions a route requires, compiled once by requires_auth()
+
+    permission and every permission in all_of must be granted (AND), and
+    when any_of is given at least one of those as well (OR). allows() takes
+    the frozenset of permissions of a token, so a check is a subset and a
+    disjoint test no matter how many permissions the token carries.
+    EXAMPLE
+        rule = PermissionRule(any_of=['patch:drinks', 'delete:drinks'])
+        rule.allows(frozenset(payload['permissions']))
+'''
+
+
+class PermissionRule(object):
+
+    def __init__(self, permission='', any_of=None, all_of=None):
+        required = set(all_of or [])
+        if permission:
+            required.add(permission)
+        self.all_of = frozenset(required)
+        self.any_of = frozenset(any_of) if any_of else None
+
+    def allows(self, permissions):
+        if not self.all_of <= permissions:
+            return False
+        return self.any_of is None or not self.any_of.isdisjoint(permissions)
+
+    def __repr__(self):
+        return 'PermissionRule(all_of={}, any_of={})'.format(
+            sorted(self.all_of), sorted(self.any_of or []))
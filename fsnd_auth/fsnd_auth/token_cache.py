@@ -0,0 +1,81 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+
+'''
+TokenCache
+    bounded LRU of verified JWT payloads keyed by the SHA-256 of the token
+
+    A payload is served until the token's exp claim, and never longer than
+    max_age seconds, so a revoked signing key stops being honoured soon
+    after it is rotated out. Only the hash of the token is kept as key.
+    hits and misses count lookups.
+    EXAMPLE
+        payload = tokens.get(token)
+        if payload is None:
+            payload = verify(token)
+            tokens.put(token, payload, exp=payload.get('exp'))
+'''
+
+
+class TokenCache(object):
+
+    def __init__(self, capacity=1024, max_age=300):
+        self.capacity = capacity
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token):
+        if isinstance(token, str):
+            token = token.encode('utf-8')
+        return hashlib.sha256(token).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                expires, payload = entry
+                if time.time() < expires:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return payload
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, payload, exp=None):
+        # payload can be anything derived from the verified token, exp is
+        # its expiry as a unix timestamp
+        expires = time.time() + self.max_age
+        if exp is not None:
+            try:
+                expires = min(expires, float(exp))
+            except (TypeError, ValueError):
+                return
+        key = self._key(token)
+        with self.lock:
+            self.entries[key] = (expires, payload)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.capacity:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,167 @@
+import json
+from abc import ABC, abstractmethod
+
+from jose import jwt
+
+from .errors import AuthError
+from .jwks import JWKSKeyStore, JWKSUnavailable
+
+
+'''
+Verifiers
+    check the signature and claims of a token and return its payload,
+    raising AuthError otherwise. Build one per app and reuse it: the keys
+    are loaded once and kept by the verifier.
+
+    JWKSVerifier(keys, audience, issuer)
+        RS256 tokens signed with a key of a JWKSKeyStore, picked by kid
+    RemoteJWKSVerifier(domain, audience, algorithms=('RS256',))
+        JWKSVerifier for an Auth0 tenant, domain with or without https://
+    StaticKeyVerifier(path, audience, issuer)
+        keys read once from a local file, either a JWKS (.json) or a PEM
+        public key
+    SharedSecretVerifier(secret, audience, issuer)
+        HS256 tokens signed with a shared secret, for tests and offline
+        load tests
+'''
+
+
+def decode(token, key, algorithms, audience, issuer):
+    try:
+        return jwt.decode(
+            token,
+            key,
+            algorithms=algorithms,
+            audience=audience,
+            issuer=issuer
+        )
+
+    except jwt.ExpiredSignatureError:
+        raise AuthError({
+            'code': 'token_expired',
+            'description': 'Token expired.'
+        }, 401)
+
+    except jwt.JWTClaimsError:
+        raise AuthError({
+            'code': 'invalid_claims',
+            'description': 'Incorrect claims. Please, check the audience and issuer.'
+        }, 401)
+    except Exception:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Unable to parse authentication token.'
+        }, 400)
+
+
+def unverified_kid(token):
+    try:
+        unverified_header = jwt.get_unverified_header(token)
+    except Exception:
+        unverified_header = {}
+    if 'kid' not in unverified_header:
+        raise AuthError({
+            'code': 'invalid_header',
+            'description': 'Authorization malformed.'
+        }, 401)
+    return unverified_header['kid']
+
+
+def key_not_found():
+    return AuthError({
+        'code': 'invalid_header',
+        'description': 'Unable to find the appropriate key.'
+    }, 400)
+
+
+def auth0_domain(domain):
+    # 'https://tenant.auth0.com/' and 'tenant.auth0.com' are the same tenant
+    domain = domain.strip().rstrip('/')
+    for scheme in ('https://', 'http://'):
+        if domain.startswith(scheme):
+            domain = domain[len(scheme):]
+    return domain
+
+
+class Verifier(ABC):
+    algorithms = ['RS256']
+
+    @abstractmethod
+    def verify(self, token):
+        pass
+
+
+class JWKSVerifier(Verifier):
+
+    def __init__(self, keys, audience, issuer, algorithms=('RS256',)):
+        self.keys = keys
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = list(algorithms)
+
+    def verify(self, token):
+        kid = unverified_kid(token)
+        try:
+            rsa_key = self.keys.get(kid)
+        except JWKSUnavailable:
+            raise AuthError({
+                'code': 'jwks_unavailable',
+                'description': 'Unable to fetch the signing keys.'
+            }, 503)
+
+        if not rsa_key:
+            raise key_not_found()
+        return decode(token, rsa_key, self.algorithms, self.audience,
+                      self.issuer)
+
+
+class RemoteJWKSVerifier(JWKSVerifier):
+
+    def __init__(self, domain, audience, jwks_url=None, ttl=600,
+                 algorithms=('RS256',)):
+        domain = auth0_domain(domain)
+        if jwks_url is None:
+            jwks_url = 'https://{}/.well-known/jwks.json'.format(domain)
+        super().__init__(JWKSKeyStore(jwks_url, ttl=ttl), audience,
+                         'https://{}/'.format(domain), algorithms=algorithms)
+
+
+class StaticKeyVerifier(Verifier):
+
+    def __init__(self, path, audience, issuer, algorithms=('RS256',)):
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = list(algorithms)
+        with open(path) as key_file:
+            contents = key_file.read()
+        if path.endswith('.json'):
+            # keys without a kid can never be picked, as in JWKSKeyStore
+            self.keys = {key['kid']: key for key in json.loads(contents)['keys']
+                         if 'kid' in key}
+            self.key = None
+        else:
+            self.keys = None
+            self.key = contents
+
+    def verify(self, token):
+        if self.keys is None:
+            key = self.key
+        else:
+            key = self.keys.get(unverified_kid(token))
+            if key is None:
+                raise key_not_found()
+        return decode(token, key, self.algorithms, self.audience,
+                      self.issuer)
+
+
+class SharedSecretVerifier(Verifier):
+
+    def __init__(self, secret, audience, issuer):
+        self.secret = secret
+        self.audience = audience
+        self.issuer = issuer
+        self.algorithms = ['HS256']
+
+    def verify(self, token):
+        return decode(token, self.secret, self.algorithms, self.audience,
+                      self.issuer)
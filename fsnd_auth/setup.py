@@ -0,0 +1,11 @@
+from setuptools import setup
+
+
+# Shared JWT auth for the Flask apps of this repository. Install it next to
+# each app with `pip install -e <path to this folder>`, the apps already
+# pin Flask and python-jose themselves.
+setup(
+    name='fsnd-auth',
+    version='0.1.0',
+    packages=['fsnd_auth'],
+)
@@ -0,0 +1,353 @@
+import os
+import json
+import time
+import hashlib
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+from flask import Flask, jsonify
+from jose import jwt
+
+from fsnd_auth import (AuthError, Authenticator, Verifier, StaticKeyVerifier,
+                       SharedSecretVerifier, JWKSKeyStore, JWKSUnavailable,
+                       JWKSVerifier, TokenCache, PermissionRule)
+
+
+SECRET = 'test-secret'
+AUDIENCE = 'coffee'
+ISSUER = 'https://fsnd.test/'
+
+
+def make_token(secret=SECRET, permissions=('get:drinks-detail',), **claims):
+    payload = {
+        'sub': 'auth0|tester',
+        'aud': AUDIENCE,
+        'iss': ISSUER,
+        'exp': int(time.time()) + 3600,
+        'permissions': list(permissions)
+    }
+    payload.update(claims)
+    return jwt.encode(payload, secret, algorithm='HS256')
+
+
+class AuthenticatorTestCase(unittest.TestCase):
+    """This class represents the requires_auth test case"""
+
+    def setUp(self):
+        """Define a test app with one protected route"""
+        self.app = Flask(__name__)
+        auth = Authenticator(SharedSecretVerifier(SECRET, AUDIENCE, ISSUER))
+
+        @self.app.route('/drinks-detail')
+        @auth.requires_auth('get:drinks-detail')
+        def drinks_detail(payload):
+            return jsonify({'success': True, 'sub': payload['sub']})
+
+        @self.app.errorhandler(AuthError)
+        def auth_error(error):
+            return jsonify({
+                'success': False,
+                'code': error.error['code']
+            }), error.status_code
+
+        self.client = self.app.test_client()
+
+    def get(self, token=None):
+        headers = {}
+        if token is not None:
+            headers['Authorization'] = 'Bearer ' + token
+        res = self.client.get('/drinks-detail', headers=headers)
+        return res, json.loads(res.data)
+
+    def test_hs256_round_trip(self):
+        res, data = self.get(make_token())
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['sub'], 'auth0|tester')
+
+    def test_cached_token_is_accepted_again(self):
+        token = make_token()
+        self.get(token)
+        res, data = self.get(token)
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_401_missing_header(self):
+        res, data = self.get()
+
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(data['code'], 'authorization_header_missing')
+
+    def test_401_expired_token(self):
+        res, data = self.get(make_token(exp=int(time.time()) - 60))
+
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(data['code'], 'token_expired')
+
+    def test_401_wrong_issuer(self):
+        res, data = self.get(make_token(iss='https://elsewhere.test/'))
+
+        self.assertEqual(res.status_code, 401)
+        self.assertEqual(data['code'], 'invalid_claims')
+
+    def test_400_wrong_secret(self):
+        res, data = self.get(make_token(secret='not-the-secret'))
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['code'], 'invalid_header')
+
+    def test_403_missing_permission(self):
+        res, data = self.get(make_token(permissions=['get:drinks']))
+
+        self.assertEqual(res.status_code, 403)
+        self.assertEqual(data['code'], 'unauthorized')
+
+
+class VerifierTestCase(unittest.TestCase):
+    """This class represents the verifier test case"""
+
+    def test_verifier_requires_verify(self):
+        class NoVerify(Verifier):
+            pass
+
+        with self.assertRaises(TypeError):
+            NoVerify()
+
+    def test_shared_secret_requires_issuer(self):
+        with self.assertRaises(TypeError):
+            SharedSecretVerifier(SECRET, AUDIENCE)
+
+    def test_static_keys_without_kid_are_skipped(self):
+        jwks = {'keys': [
+            {'kty': 'RSA', 'kid': 'signing', 'n': 'n', 'e': 'AQAB'},
+            {'kty': 'RSA', 'n': 'n', 'e': 'AQAB'}
+        ]}
+        fd, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as jwks_file:
+            json.dump(jwks, jwks_file)
+        try:
+            verifier = StaticKeyVerifier(path, AUDIENCE, ISSUER)
+        finally:
+            os.remove(path)
+
+        self.assertEqual(list(verifier.keys), ['signing'])
+
+
+class StubKeyStore(JWKSKeyStore):
+    # serves the queued key sets instead of fetching the url, an exception
+    # in the queue is raised by that fetch
+
+    def __init__(self, *results, **kwargs):
+        super().__init__('stub://jwks', **kwargs)
+        self.results = list(results)
+        self.fetches = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def _fetch(self):
+        self.fetches += 1
+        self.release.wait(5)
+        result = self.results.pop(0) if len(self.results) > 1 \
+            else self.results[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+class JWKSKeyStoreTestCase(unittest.TestCase):
+    """This class represents the signing key store test case"""
+
+    def setUp(self):
+        self.clock = 1000.0
+        patcher = mock.patch('fsnd_auth.jwks.time.monotonic',
+                             side_effect=lambda: self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def wait_for_refresh(self, keys):
+        for _ in range(500):
+            if not keys.refreshing:
+                return
+            time.sleep(0.01)
+        self.fail('background refresh did not finish')
+
+    def test_fresh_hit(self):
+        keys = StubKeyStore({'a': 'key a'}, ttl=600)
+
+        self.assertEqual(keys.get('a'), 'key a')
+        self.clock += 10
+        self.assertEqual(keys.get('a'), 'key a')
+        self.assertEqual(keys.fetches, 1)
+
+    def test_stale_keys_are_served_while_refreshing(self):
+        keys = StubKeyStore({'a': 'old key a'}, {'a': 'new key a'}, ttl=600)
+        keys.get('a')
+        self.clock += 601
+
+        keys.release.clear()
+        self.assertEqual(keys.get('a'), 'old key a')
+        self.assertTrue(keys.refreshing)
+        # only one refresh runs at a time
+        self.assertEqual(keys.get('a'), 'old key a')
+        keys.release.set()
+        self.wait_for_refresh(keys)
+
+        self.assertEqual(keys.fetches, 2)
+        self.assertEqual(keys.get('a'), 'new key a')
+
+    def test_unknown_kid_triggers_one_fetch(self):
+        keys = StubKeyStore({'a': 'key a'}, {'a': 'key a', 'b': 'key b'},
+                            min_refetch_interval=30)
+        keys.get('a')
+        self.clock += 31
+
+        self.assertEqual(keys.get('b'), 'key b')
+        self.assertEqual(keys.fetches, 2)
+        # a made up kid right after does not fetch again
+        self.assertIsNone(keys.get('made-up'))
+        self.assertEqual(keys.fetches, 2)
+
+    def test_failed_fetch_after_expiry_keeps_the_keys(self):
+        keys = StubKeyStore({'a': 'key a'}, OSError('provider down'), ttl=600)
+        keys.get('a')
+        self.clock += 601
+
+        self.assertEqual(keys.get('a'), 'key a')
+        self.wait_for_refresh(keys)
+        self.assertEqual(keys.fetches, 2)
+        self.assertEqual(keys.get('a'), 'key a')
+
+    def test_unavailable_without_keys(self):
+        keys = StubKeyStore(OSError('provider down'))
+
+        with self.assertRaises(JWKSUnavailable):
+            keys.get('a')
+
+        verifier = JWKSVerifier(keys, AUDIENCE, ISSUER)
+        token = jwt.encode({'sub': 'x'}, SECRET, algorithm='HS256',
+                           headers={'kid': 'a'})
+        with self.assertRaises(AuthError) as raised:
+            verifier.verify(token)
+        self.assertEqual(raised.exception.status_code, 503)
+
+
+class CountingVerifier(SharedSecretVerifier):
+
+    def __init__(self):
+        super().__init__(SECRET, AUDIENCE, ISSUER)
+        self.calls = 0
+
+    def verify(self, token):
+        self.calls += 1
+        return super().verify(token)
+
+
+class TokenCacheTestCase(unittest.TestCase):
+    """This class represents the verified token cache test case"""
+
+    def test_keys_are_token_digests(self):
+        tokens = TokenCache()
+        token = make_token()
+        tokens.put(token, 'payload')
+
+        self.assertEqual(list(tokens.entries),
+                         [hashlib.sha256(token.encode('utf-8')).digest()])
+        self.assertEqual(tokens.get(token), 'payload')
+
+    def test_lru_eviction_at_capacity(self):
+        tokens = TokenCache(capacity=2)
+        tokens.put('first', 1)
+        tokens.put('second', 2)
+        # a hit makes first the most recently used
+        tokens.get('first')
+        tokens.put('third', 3)
+
+        self.assertEqual(tokens.stats()['size'], 2)
+        self.assertIsNone(tokens.get('second'))
+        self.assertEqual(tokens.get('first'), 1)
+        self.assertEqual(tokens.get('third'), 3)
+
+    def test_expired_entry_is_evicted_and_verified_again(self):
+        verifier = CountingVerifier()
+        auth = Authenticator(verifier)
+        exp = int(time.time()) + 60
+        token = make_token(exp=exp)
+
+        auth.verify_token(token)
+        auth.verify_token(token)
+        self.assertEqual(verifier.calls, 1)
+
+        # past exp the cached payload is dropped, verifying the token again
+        # (the signature check itself is done with the real clock)
+        with mock.patch('fsnd_auth.token_cache.time.time',
+                        return_value=exp + 1):
+            self.assertIsNone(auth.tokens.get(token))
+            self.assertEqual(auth.tokens.stats()['size'], 0)
+            auth.verify_token(token)
+        self.assertEqual(verifier.calls, 2)
+
+
+class PermissionRuleTestCase(unittest.TestCase):
+    """This class represents the route permission rule test case"""
+
+    def setUp(self):
+        self.auth = Authenticator(SharedSecretVerifier(SECRET, AUDIENCE, ISSUER))
+
+    def test_any_of_allows_one_match(self):
+        rule = PermissionRule(any_of=['patch:drinks', 'delete:drinks'])
+
+        self.assertTrue(rule.allows(frozenset(['delete:drinks'])))
+        self.assertTrue(rule.allows(
+            frozenset(['patch:drinks', 'delete:drinks', 'get:drinks'])))
+
+    def test_any_of_without_a_match(self):
+        rule = PermissionRule(any_of=['patch:drinks', 'delete:drinks'])
+
+        self.assertFalse(rule.allows(frozenset(['get:drinks'])))
+        self.assertFalse(rule.allows(frozenset()))
+
+    def test_all_of_with_a_partial_set(self):
+        rule = PermissionRule('get:drinks-detail',
+                              all_of=['patch:drinks', 'delete:drinks'])
+
+        self.assertFalse(rule.allows(
+            frozenset(['get:drinks-detail', 'patch:drinks'])))
+        self.assertTrue(rule.allows(
+            frozenset(['get:drinks-detail', 'patch:drinks', 'delete:drinks'])))
+
+    def test_all_of_and_any_of_together(self):
+        rule = PermissionRule(all_of=['get:drinks'],
+                              any_of=['patch:drinks', 'delete:drinks'])
+
+        self.assertFalse(rule.allows(frozenset(['patch:drinks'])))
+        self.assertTrue(rule.allows(frozenset(['get:drinks', 'patch:drinks'])))
+
+    def test_403_through_requires_auth(self):
+        app = Flask(__name__)
+
+        @app.route('/drinks/<int:drink_id>', methods=['PATCH'])
+        @self.auth.requires_auth(any_of=['patch:drinks', 'delete:drinks'])
+        def edit_drink(payload, drink_id):
+            return jsonify({'success': True})
+
+        with app.test_request_context(
+                '/drinks/1', method='PATCH', headers={
+                    'Authorization': 'Bearer ' + make_token(
+                        permissions=['get:drinks'])}):
+            with self.assertRaises(AuthError) as raised:
+                edit_drink(drink_id=1)
+
+        self.assertEqual(raised.exception.status_code, 403)
+        self.assertEqual(raised.exception.error['code'], 'unauthorized')
+
+        res = app.test_client().patch('/drinks/1', headers={
+            'Authorization': 'Bearer ' + make_token(
+                permissions=['delete:drinks'])})
+        self.assertEqual(res.status_code, 200)
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -2,11 +2,12 @@
 # Imports
 #----------------------------------------------------------------------------#
 
+import io
 import json
-import dateutil.parser
-import babel
+import click
 from flask import (Flask, render_template, request,
-        Response, flash, redirect, url_for, jsonify)
+        Response, flash, redirect, url_for, jsonify, abort,
+        stream_with_context)
 from flask_moment import Moment
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
@@ -15,6 +16,15 @@ from logging import Formatter, FileHandler
 from flask_wtf import Form
 from forms import *
 from models import Venue, Artist, Show, db_setup
+import dal
+from directory import venue_directory
+from timeline import show_timeline
+from search import search
+from show_listing import ShowPage
+from formatting import format_datetime
+from show_import import import_shows, FORMATS as IMPORT_FORMATS
+import counters
+from seed import Seeder
 from flask_migrate import Migrate
 
 import sys
@@ -26,6 +36,7 @@ app = Flask(__name__)
 moment = Moment(app)
 app.config.from_object('config')
 db = db_setup(app)
+dal.init_app(app)
 
 
 # DONE TODO: connect to a local postgresql database
@@ -35,16 +46,19 @@ db = db_setup(app)
 # Filters.
 #----------------------------------------------------------------------------#
 
-def format_datetime(value, format='medium'):
-    date = dateutil.parser.parse(value)
-    if format == 'full':
-        format = "EEEE MMMM, d, y 'at' h:mma"
-    elif format == 'medium':
-        format = "EE MM, dd, y h:mma"
-    return babel.dates.format_datetime(date, format)
+# format_datetime takes datetime objects and caches compiled babel
+# patterns and recent results, see formatting.py
+app.jinja_env.filters['datetime'] = format_datetime
 
 
-app.jinja_env.filters['datetime'] = format_datetime
+def stream_template(template_name, **context):
+    # Renders the template in chunks instead of building the whole page
+    # in memory, see http://flask.pocoo.org/docs/1.0/patterns/streaming/
+    app.update_template_context(context)
+    template = app.jinja_env.get_template(template_name)
+    stream = template.stream(context)
+    stream.enable_buffering(5)
+    return stream
 
 #----------------------------------------------------------------------------#
 # Controllers.
@@ -63,35 +77,13 @@ def index():
 def venues():
     # DONE: replace with real venues data.
     #       num_shows should be aggregated based on number of upcoming shows per venue.
-    sql = text('select city, state FROM public."Venue" GROUP BY city, state ORDER BY city')
-    venue_groups = db.engine.execute(sql).fetchall()
-
-    # venue_groups = db.session.query(Venue.city, Venue.state).group_by(
-    #     Venue.city, Venue.state).all()
-    data = []
-    for venue_group in venue_groups:
-        city_name = venue_group[0]
-        city_state = venue_group[1]
-        sql2 = text("""select * FROM public."Venue" where city = :city_name""")
-        venues = db.engine.execute(sql2, city_name = city_name).fetchall()
-
-        # removed orm syntax in favor of raw sql as per project requirements
-        # filtered = db.session.query(Venue).filter(
-        #     Venue.city == city_name, Venue.state == city_state)
-        group = {
-            "city": city_name,
-            "state": city_state,
-            "venues": []
-        }
-
-        # List venues in the city/state group
-        for venue in venues:
-            group['venues'].append({
-                "id": venue.id,
-                "name": venue.name,
-                # "num_shows_upcoming": len(venue.shows)
-            })
-        data.append(group)
+    # The city/state groups and the upcoming show counts are built from a
+    # single raw sql query, see directory.py
+    # ?genre=Jazz&state=CA narrows the directory down
+    # ?sort=upcoming lists the busiest venues of each city first
+    data = venue_directory(
+        genre=request.args.get('genre'), state=request.args.get('state'),
+        sort=request.args.get('sort', 'name'))
     return render_template('pages/venues.html', areas=data)
 
 
@@ -101,21 +93,12 @@ def search_venues():
     # seach for Hop should return "The Musical Hop".
     # search for "Music" should return "The Musical Hop" and "Park Square Live Music & Coffee"
     search_term = request.form['search_term']
-    # Using raw sql instead of the orm syntax as required by rubric:
-    sql = text('select * FROM public."Venue" where name ilike :search_string')
-    results = db.engine.execute(sql, search_string='%'+search_term+'%')
-    venues = results.fetchall()
-    # venues = Venue.query.filter(Venue.name.ilike('%'+search_term+'%')).all()
-    response = {}
-    response["count"] = len(venues)
-    data = []
-    for venue in venues:
-        current_venue = {}
-        current_venue["id"] = venue.id
-        current_venue["name"] = venue.name
-        data.append(current_venue)
-
-    response["data"] = data
+    # Ranked, paged trigram search, see search.py
+    response = search(
+        'Venue', search_term,
+        page=request.form.get('page', 1, type=int),
+        per_page=app.config['SEARCH_RESULTS_PER_PAGE'],
+        count_limit=app.config['SEARCH_COUNT_LIMIT'])
 
     return render_template('pages/search_venues.html', results=response, search_term=request.form.get('search_term', ''))
 
@@ -126,14 +109,16 @@ def show_venue(venue_id):
     # DONE: replace with real venue data from the venues table, using venue_id
 
     sql = text("""select * from public."Venue" where id = :venue_id""") 
-    venue = db.engine.execute(sql, venue_id=venue_id).fetchone()
+    venue = dal.execute(sql, venue_id=venue_id).fetchone()
 
     if venue:
-        related_shows = Show.query.filter_by(venue_id=venue_id).all()
+        timeline = show_timeline(
+            venue_id=venue_id,
+            past_limit=app.config.get('PAST_SHOWS_LIMIT'))
         data = {
             "id": venue_id,
             "name": venue.name,
-            "genres": venue.genres.split(','),
+            "genres": venue.genres,
             "address": venue.address,
             "city": venue.city,
             "state": venue.state,
@@ -143,11 +128,8 @@ def show_venue(venue_id):
             "seeking_talent": venue.seeking_talent,
             "seeking_description": venue.seeking_description,
             "image_link": venue.image_link,
-            "past_shows": past_shows(related_shows),
-            "upcoming_shows": upcoming_shows(related_shows),
-            "past_shows_count": past_shows_count(related_shows),
-            "upcoming_shows_count": upcoming_shows_count(related_shows),
         }
+        data.update(timeline)
     else:
         flash('An error occurred. Venue id:' +
               str(venue_id) + ' could not be found.')
@@ -191,27 +173,25 @@ def create_venue_submission():
                 """
             )
             
-            db.engine.execute(
+            dal.execute(
                 sql, name=form.name.data,
                 city=form.city.data,
                 state=form.state.data,
                 address=form.address.data,
                 phone=form.phone.data,
-                genres=','.join(tmp_genres),
+                genres=tmp_genres,
                 website=form.website.data,
                 facebook_link=form.facebook_link.data,
                 image_link=form.image_link.data,
                 seeking_talent=form.seeking_talent.data,
                 seeking_description=form.seeking_description.data
             )
-            db.session.commit()
             
             # on successful db insert, flash success
             flash('Venue ' + request.form['name'] +
                     ' was successfully listed!', 'success')
         except:
             error = True
-            db.session.rollback()
             print(sys.exc_info())
             flash('An error occurred. Venue ' +
                 request.form['name'] + ' could not be listed.', 'error')
@@ -274,8 +254,16 @@ def delete_venue(venue_id):
 @app.route('/artists')
 def artists():
     # DONE: replace with real data returned from querying the database
-    sql = text('select id, name FROM public."Artist" ORDER BY name asc')
-    names = db.engine.execute(sql)
+    genre = request.args.get('genre')
+    if genre:
+        # answered from the GIN index on the genres array
+        sql = text("""select id, name FROM public."Artist"
+            where genres @> cast(array[:genre] as varchar[])
+            ORDER BY name asc""")
+        names = dal.execute(sql, genre=genre)
+    else:
+        sql = text('select id, name FROM public."Artist" ORDER BY name asc')
+        names = dal.execute(sql)
     data = names.fetchall()
     return render_template('pages/artists.html', artists=data)
 
@@ -287,24 +275,12 @@ def search_artists():
     # search for "band" should return "The Wild Sax Band".
 
     search_term = request.form['search_term']
-    # Using raw sql instead of the orm syntax as required by rubric:
-    sql = text('select * FROM public."Artist" where name ilike :search_string')
-    results = db.engine.execute(sql, search_string='%'+search_term+'%')
-    artists = results.fetchall()
-
-    # artists = Artist.query.filter(Artist.name.ilike('%'+search_term+'%')).all()
-
-    response = {}
-    response["count"] = len(artists)
-    data = []
-
-    for artist in artists:
-        current_artist = {}
-        current_artist["id"] = artist.id
-        current_artist["name"] = artist.name
-        data.append(current_artist)
-
-    response["data"] = data
+    # Ranked, paged trigram search, see search.py
+    response = search(
+        'Artist', search_term,
+        page=request.form.get('page', 1, type=int),
+        per_page=app.config['SEARCH_RESULTS_PER_PAGE'],
+        count_limit=app.config['SEARCH_COUNT_LIMIT'])
 
     return render_template('pages/search_artists.html', results=response, search_term=request.form.get('search_term', ''))
 
@@ -314,14 +290,16 @@ def show_artist(artist_id):
     # shows the venue page with the given venue_id
     # DONE: replace with real venue data from the venues table, using venue_id
     sql = text("""select * from public."Artist" where id = :artist_id""") 
-    artist = db.engine.execute(sql, artist_id=artist_id).fetchone()
+    artist = dal.execute(sql, artist_id=artist_id).fetchone()
     # artist = Artist.query.get(artist_id)
     if artist:
-        related_shows = Show.query.filter_by(artist_id=artist_id).all()
+        timeline = show_timeline(
+            artist_id=artist_id,
+            past_limit=app.config.get('PAST_SHOWS_LIMIT'))
         data = {
             "id": artist_id,
             "name": artist.name,
-            "genres": artist.genres.split(','),
+            "genres": artist.genres,
             "city": artist.city,
             "state": artist.state,
             "phone": artist.phone,
@@ -330,11 +308,8 @@ def show_artist(artist_id):
             "seeking_venue": artist.seeking_venue,
             "seeking_description": artist.seeking_description,
             "image_link": artist.image_link,
-            "past_shows": past_shows(related_shows),
-            "upcoming_shows": upcoming_shows(related_shows),
-            "past_shows_count": past_shows_count(related_shows),
-            "upcoming_shows_count": upcoming_shows_count(related_shows),
         }
+        data.update(timeline)
     else:
         flash('An error occurred. Artist id:' +
               str(artist_id) + ' could not be found.')
@@ -353,7 +328,7 @@ def show_artist(artist_id):
 def edit_artist(artist_id):
     artist = Artist.query.get(artist_id)
     form = ArtistForm(obj=artist)
-    form.genres.data = artist.genres.split(',')
+    form.genres.data = artist.genres
     # DONE: populate form with fields from artist with ID <artist_id>
     return render_template('forms/edit_artist.html', form=form, artist=artist)
 
@@ -366,7 +341,7 @@ def edit_artist_submission(artist_id):
     # Using raw sql instead of SQLAlchemy ORM
     # artist = Artist.query.get(artist_id)
     sql = text("""select * from public."Artist" where id = :artist_id""") 
-    artist = db.engine.execute(sql, artist_id=artist_id).fetchone()    
+    artist = dal.execute(sql, artist_id=artist_id).fetchone()    
     form = ArtistForm()
 
     if form.validate():
@@ -388,13 +363,13 @@ def edit_artist_submission(artist_id):
                 WHERE id = :artist_id
                 """)
 
-            db.engine.execute(
+            dal.execute(
                 sql,
                 name=form.name.data,
                 city=form.city.data,
                 state=form.state.data,
                 phone=form.phone.data,
-                genres=','.join(tmp_genres),
+                genres=tmp_genres,
                 website=form.website.data,
                 facebook_link=form.facebook_link.data,
                 image_link=form.image_link.data,
@@ -402,7 +377,6 @@ def edit_artist_submission(artist_id):
                 seeking_description=form.seeking_description.data,
                 artist_id=artist_id
             )
-            db.session.commit()
 
             # on successful db insert, flash success
             flash('Artist ' + request.form['name'] +
@@ -410,7 +384,6 @@ def edit_artist_submission(artist_id):
 
         except:
             error = True
-            db.session.rollback()
             print(sys.exc_info())
             # on error, flash error message
             flash('An error occurred. Artist ' +
@@ -433,7 +406,7 @@ def edit_venue(venue_id):
     # DONE: populate form with values from venue with ID <venue_id>
     venue = Venue.query.get(venue_id)
     form = VenueForm(obj=venue)
-    form.genres.data = venue.genres.split(',')
+    form.genres.data = venue.genres
 
     return render_template('forms/edit_venue.html', form=form, venue=venue)
 
@@ -446,7 +419,7 @@ def edit_venue_submission(venue_id):
     # Using raw sql instead of SQLAlchemy ORM
     # venue = Venue.query.get(venue_id)
     sql = text("""select * from public."Venue" where id = :venue_id""") 
-    venue = db.engine.execute(sql, venue_id=venue_id).fetchone()
+    venue = dal.execute(sql, venue_id=venue_id).fetchone()
     form = VenueForm()
     if form.validate():
 
@@ -468,13 +441,13 @@ def edit_venue_submission(venue_id):
                 seeking_description = :seeking_description
                 WHERE id = :venue_id
                 """)
-            db.engine.execute(
+            dal.execute(
                 sql, name = form.name.data,
                 city = form.city.data,
                 state = form.state.data,
                 address = form.address.data,
                 phone = form.phone.data,
-                genres = ','.join(tmp_genres),
+                genres = tmp_genres,
                 website = form.website.data,
                 facebook_link = form.facebook_link.data,
                 image_link = form.image_link.data,
@@ -484,14 +457,12 @@ def edit_venue_submission(venue_id):
             )
 
 
-            db.session.commit()
             # on successful db insert, flash success
             flash('Venue ' + request.form['name'] +
                 ' was successfully updated!')
 
         except:
             error = True
-            db.session.rollback()
             print(sys.exc_info())
             # on error, flash error message
             flash('An error occurred. Venue ' +
@@ -541,26 +512,24 @@ def create_artist_submission():
                 """
             )
 
-            db.engine.execute(
+            dal.execute(
                 sql,
                 name=form.name.data,
                 city=form.city.data,
                 state=form.state.data,
                 phone=form.phone.data,
-                genres=','.join(tmp_genres),
+                genres=tmp_genres,
                 website=form.website.data,
                 facebook_link=form.facebook_link.data,
                 image_link=form.image_link.data,
                 seeking_venue=form.seeking_venue.data,
                 seeking_description=form.seeking_description.data
             )
-            db.session.commit()
             flash('Artist ' + request.form['name'] +
                     ' was successfully listed!', 'success')
 
         except:
             error = True
-            db.session.rollback()
             print(sys.exc_info())
             
             # see: http://flask.pocoo.org/docs/1.0/patterns/flashing/
@@ -593,35 +562,18 @@ def shows():
     # displays list of shows at /shows
     # DONE: replace with real artists data.
     #       num_shows should be aggregated based on number of upcoming shows per venue.
-    # shows = Show.query.all()
-    # Using raw sql instead of orm syntax as per project requirement
-    sql = text("""
-        Select public."Show".*, 
-        public."Venue".name as venue_name, 
-        public."Venue".image_link as venue_image_link, 
-        public."Artist".name as artist_name, 
-        public."Artist".image_link as artist_image_link
-        from public."Show" join public."Venue"
-        on public."Show".venue_id = public."Venue".id
-        join public."Artist"
-        on public."Show".artist_id = public."Artist".id
-        order by start_time asc  
-            """)
-    shows = db.engine.execute(sql).fetchall()
-    data = []
-    for show in shows:
-        show = {
-            "venue_id": show.venue_id,
-            "venue_name": show.venue_name,
-            "venue_image_link": show.venue_image_link,
-            "artist_id": show.artist_id,
-            "artist_name": show.artist_name,
-            "artist_image_link": show.artist_image_link,
-            "start_time": format_datetime(str(show.start_time))
-        }
-        data.append(show)
+    # Shows are paged with a (start_time, id) keyset cursor and the page is
+    # streamed, see show_listing.py. ?upcoming=1 only lists future shows.
+    try:
+        page = ShowPage(
+            db, after=request.args.get('after'),
+            upcoming=request.args.get('upcoming', 0, type=int) == 1,
+            per_page=app.config['SHOWS_PER_PAGE'])
+    except ValueError:
+        abort(400)
 
-    return render_template('pages/shows.html', shows=data)
+    return Response(stream_with_context(
+        stream_template('pages/shows.html', shows=page)))
 
 
 @app.route('/shows/create')
@@ -646,17 +598,15 @@ def create_show_submission():
                 """            
         )
         
-        db.engine.execute(
+        dal.execute(
             sql, artist_id=form.artist_id.data,
             venue_id=form.venue_id.data,
             start_time=form.start_time.data
         )       
-        db.session.commit()
         # on successful db insert, flash success        
         flash('Show was successfully listed!', 'success')
     except:
         error = True
-        db.session.rollback()
         print(sys.exc_info())
         # DONE: on unsuccessful db insert, flash an error instead.
         flash('An error occurred. Show could not be listed.', 'error')
@@ -668,52 +618,81 @@ def create_show_submission():
     # return redirect(url_for('shows'))
     return render_template('pages/home.html')
 
-# Functions about date calculations inspired by 
-# https://github.com/AlbuquerqueJC/fyyur/blob/master/app.py
-# Slightly modified. This approach was preferred instead of
-# static methods on the models.
-
-def upcoming_shows(shows):
-    upcoming = []
-    for show in shows:
-        if show.start_time > datetime.now():
-            upcoming.append({
-                "venue_id": show.venue_id,
-                "venue_name": show.venue.name,
-                "venue_image_link": show.venue.image_link,
-                "artist_id": show.artist_id,
-                "artist_name": show.artist.name,
-                "artist_image_link": show.artist.image_link,
-                "start_time": format_datetime(str(show.start_time))
-            })
-
-    return upcoming
-
-
-def upcoming_shows_count(shows):
-    return len(upcoming_shows(shows))
-
+#  Bulk show import
+#  ----------------------------------------------------------------
 
-def past_shows(shows):
-    past = []
-    for show in shows:
-        if show.start_time < datetime.now():
-            past.append({
+@app.route('/shows/import', methods=['POST'])
+def import_shows_submission():
+    # Streams a CSV (text/csv) or JSON lines body straight into the Show
+    # table, see show_import.py. Responds with the inserted and rejected counts.
+    format = request.args.get('format')
+    if format is None:
+        format = 'csv' if request.mimetype == 'text/csv' else 'jsonl'
+    if format not in IMPORT_FORMATS:
+        abort(400)
+
+    stream = io.TextIOWrapper(request.stream, encoding='utf-8')
+    summary = import_shows(
+        db, stream, format, batch_size=app.config['IMPORT_BATCH_SIZE'])
+    return jsonify(summary)
+
+
+@app.cli.command('import-shows')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', type=click.Choice(IMPORT_FORMATS), default=None,
+              help='Defaults to the file extension.')
+@click.option('--batch-size', type=int, default=None)
+def import_shows_command(path, format, batch_size):
+    """Bulk import shows from a CSV or JSON lines file."""
+    if format is None:
+        format = 'csv' if path.endswith('.csv') else 'jsonl'
+    with open(path, encoding='utf-8', newline='') as stream:
+        summary = import_shows(
+            db, stream, format,
+            batch_size=batch_size or app.config['IMPORT_BATCH_SIZE'])
+
+    for reject in summary['rejects']:
+        click.echo('line {line}: {reason}'.format(**reject), err=True)
+    click.echo('{} shows imported, {} rejected'.format(
+        summary['inserted'], summary['rejected']))
+
+
+#  Upcoming show counters
+#  ----------------------------------------------------------------
 
-                "venue_id": show.venue_id,
-                "venue_name": show.venue.name,
-                "venue_image_link": show.venue.image_link,
-                "artist_id": show.artist_id,
-                "artist_name": show.artist.name,
-                "artist_image_link": show.artist.image_link,
-                "start_time": format_datetime(str(show.start_time))
-            })
+@app.cli.command('rollover-show-counters')
+@click.option('--rebuild', is_flag=True,
+              help='Recompute every counter instead of rolling forward.')
+def rollover_show_counters_command(rebuild):
+    """Take shows that have started off the upcoming show counters."""
+    if rebuild:
+        counters.rebuild(db)
+        click.echo('Upcoming show counters rebuilt.')
+    else:
+        try:
+            last = counters.rollover(db)
+        except ValueError as error:
+            raise click.ClickException(str(error))
+        if last is None:
+            click.echo('Upcoming show counters are already current.')
+        else:
+            click.echo('Upcoming show counters rolled over from {}.'.format(last))
 
-    return past
 
+#  Synthetic data
+#  ----------------------------------------------------------------
 
-def past_shows_count(shows):
-    return len(past_shows(shows))
+@app.cli.command('seed')
+@click.option('--venues', type=int, default=1000)
+@click.option('--artists', type=int, default=5000)
+@click.option('--shows', type=int, default=100000)
+@click.option('--seed', 'random_seed', type=int, default=42,
+              help='The same seed always generates the same data.')
+def seed_command(venues, artists, shows, random_seed):
+    """Seed venues, artists and shows with realistic distributions."""
+    summary = Seeder(db, seed=random_seed).run(venues, artists, shows)
+    click.echo('Seeded {} venues, {} artists and {} shows.'.format(
+        venues, artists, summary['inserted']))
 
 
 @app.errorhandler(404)
@@ -0,0 +1,50 @@
+#----------------------------------------------------------------------------#
+# Micro-benchmark of the template datetime filter. Needs no database.
+#
+#   $ python -m benchmarks.bench_datetime [calls]
+#----------------------------------------------------------------------------#
+
+import sys
+import time
+from datetime import datetime, timedelta
+import dateutil.parser
+import babel.dates
+
+from formatting import format_datetime
+
+
+def legacy_format_datetime(value, format='medium'):
+    # The filter app.py registered before formatting.py
+    date = dateutil.parser.parse(value)
+    if format == 'full':
+        format = "EEEE MMMM, d, y 'at' h:mma"
+    elif format == 'medium':
+        format = "EE MM, dd, y h:mma"
+    return babel.dates.format_datetime(date, format)
+
+
+def timed(name, fn, values):
+    start = time.perf_counter()
+    for value in values:
+        fn(value)
+    elapsed = time.perf_counter() - start
+    print('{:<34} {:>9.3f}ms total {:>8.2f}us/call'.format(
+        name, elapsed * 1000, elapsed * 1e6 / len(values)))
+
+
+def main(calls=20000):
+    # a page worth of shows rendered over and over, like the list pages do
+    base = datetime(2035, 4, 1, 20, 0)
+    values = [base + timedelta(hours=i % 300) for i in range(calls)]
+
+    # templates used to receive str(show.start_time)
+    timed('legacy(str(datetime))', lambda v: legacy_format_datetime(str(v), 'full'), values)
+    timed('format_datetime(str(datetime))', lambda v: format_datetime(str(v), 'full'), values)
+    timed('format_datetime(datetime)', lambda v: format_datetime(v, 'full'), values)
+
+    for value in values[:300]:
+        assert format_datetime(value, 'full') == legacy_format_datetime(str(value), 'full')
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,174 @@
+#----------------------------------------------------------------------------#
+# Drives every Fyyur route through the Flask test client and records
+# p50/p95/p99 latency and SQL query counts per route as JSON. The POST and
+# DELETE routes write to throwaway venues, artists and shows named
+# THROWAWAY_NAME, which are seeded up front and deleted again at the end.
+#
+#   $ flask seed --venues 2000 --artists 10000 --shows 500000
+#   $ python -m benchmarks.bench_routes [output.json] [repeat]
+#----------------------------------------------------------------------------#
+
+import json
+import re
+import sys
+from datetime import datetime, timedelta
+from sqlalchemy import text
+
+from app import app, db
+from benchmarks.common import measure, report
+
+DEFAULT_OUTPUT = 'benchmarks/baseline.json'
+
+# The most booked venue and artist, to exercise the heaviest detail pages
+HOT_VENUE_SQL = text(
+    'select venue_id from public."Show" group by venue_id order by count(*) desc limit 1')
+HOT_ARTIST_SQL = text(
+    'select artist_id from public."Show" group by artist_id order by count(*) desc limit 1')
+
+
+THROWAWAY_NAME = 'Bench throwaway'
+
+SEED_VENUES_SQL = text("""
+    insert into public."Venue" (name, city, state, address, phone, genres)
+    select :name, 'Nowhere', 'CA', '1 Bench St', '555-555-5555', array['Jazz']
+    from generate_series(1, :count)
+    returning id
+    """)
+
+SEED_ARTIST_SQL = text("""
+    insert into public."Artist" (name, city, state, phone, genres)
+    values (:name, 'Nowhere', 'CA', '555-555-5555', array['Jazz'])
+    returning id
+    """)
+
+# shows go with their venue or artist (on delete cascade)
+CLEANUP_SQL = (
+    text('delete from public."Venue" where name = :name'),
+    text('delete from public."Artist" where name = :name'),
+)
+
+
+def seed_throwaway(repeat):
+    # One venue and artist to edit and book shows on, plus one venue per
+    # DELETE /venues/<id> request. Returns (venue_id, artist_id, doomed ids).
+    with db.engine.begin() as connection:
+        venue_ids = [row[0] for row in connection.execute(
+            SEED_VENUES_SQL, name=THROWAWAY_NAME, count=repeat + 1)]
+        artist_id = connection.execute(
+            SEED_ARTIST_SQL, name=THROWAWAY_NAME).scalar()
+    return venue_ids[0], artist_id, venue_ids[1:]
+
+
+def csrf_token(client):
+    # the token of the client's session, as rendered into the create forms
+    page = client.get('/venues/create').get_data(as_text=True)
+    return re.search(r'name="csrf_token" type="hidden" value="([^"]+)"',
+                     page).group(1)
+
+
+def cleanup_throwaway():
+    with db.engine.begin() as connection:
+        for sql in CLEANUP_SQL:
+            connection.execute(sql, name=THROWAWAY_NAME)
+
+
+def routes(repeat=20):
+    # (name, method, url, form, expected status). url is called for a
+    # fresh value per request when every request needs its own row.
+    venue_id = db.engine.execute(HOT_VENUE_SQL).scalar() or 1
+    artist_id = db.engine.execute(HOT_ARTIST_SQL).scalar() or 1
+    own_venue, own_artist, doomed = seed_throwaway(repeat)
+
+    venue_form = {
+        'name': THROWAWAY_NAME, 'city': 'Nowhere', 'state': 'CA',
+        'address': '1 Bench St', 'phone': '555-555-5555', 'genres': 'Jazz',
+    }
+    artist_form = {
+        'name': THROWAWAY_NAME, 'city': 'Nowhere', 'state': 'CA',
+        'phone': '555-555-5555', 'genres': 'Jazz',
+    }
+    start_time = datetime.now() + timedelta(days=30)
+    show_form = {
+        'venue_id': own_venue, 'artist_id': own_artist,
+        'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    show_import = '\n'.join(json.dumps({
+        'venue_id': own_venue, 'artist_id': own_artist,
+        'start_time': (start_time + timedelta(hours=n)).isoformat()
+    }) for n in range(100))
+
+    return [
+        ('GET /', 'get', '/', None, 200),
+        ('GET /venues', 'get', '/venues', None, 200),
+        ('GET /venues?sort=upcoming', 'get', '/venues?sort=upcoming', None, 200),
+        ('GET /venues?genre=Jazz', 'get', '/venues?genre=Jazz', None, 200),
+        ('GET /venues/<hot>', 'get', '/venues/{}'.format(venue_id), None, 200),
+        ('POST /venues/search', 'post', '/venues/search',
+         {'search_term': 'hop'}, 200),
+        ('POST /venues/search city', 'post', '/venues/search',
+         {'search_term': 'San Francisco, CA'}, 200),
+        ('GET /venues/create', 'get', '/venues/create', None, 200),
+        ('POST /venues/create', 'post', '/venues/create', venue_form, 302),
+        ('GET /venues/<id>/edit', 'get',
+         '/venues/{}/edit'.format(venue_id), None, 200),
+        ('POST /venues/<id>/edit', 'post',
+         '/venues/{}/edit'.format(own_venue), venue_form, 302),
+        ('DELETE /venues/<id>', 'delete',
+         lambda: '/venues/{}'.format(doomed.pop()), None, 200),
+        ('GET /artists', 'get', '/artists', None, 200),
+        ('GET /artists?genre=Jazz', 'get', '/artists?genre=Jazz', None, 200),
+        ('GET /artists/<hot>', 'get', '/artists/{}'.format(artist_id), None, 200),
+        ('POST /artists/search', 'post', '/artists/search',
+         {'search_term': 'band'}, 200),
+        ('GET /artists/create', 'get', '/artists/create', None, 200),
+        ('POST /artists/create', 'post', '/artists/create', artist_form, 302),
+        ('GET /artists/<id>/edit', 'get',
+         '/artists/{}/edit'.format(artist_id), None, 200),
+        ('POST /artists/<id>/edit', 'post',
+         '/artists/{}/edit'.format(own_artist), artist_form, 302),
+        ('GET /shows', 'get', '/shows', None, 200),
+        ('GET /shows?upcoming=1', 'get', '/shows?upcoming=1', None, 200),
+        ('GET /shows/create', 'get', '/shows/create', None, 200),
+        ('POST /shows/create', 'post', '/shows/create', show_form, 200),
+        ('POST /shows/import', 'post', '/shows/import?format=jsonl',
+         show_import, 200),
+    ]
+
+
+def main(output=DEFAULT_OUTPUT, repeat=20):
+    client = app.test_client()
+    results = {}
+    with app.app_context():
+        route_list = routes(repeat)
+    token = csrf_token(client)
+
+    # requests run outside of the app context above, so every request gets
+    # its own context and connection checkout like it would in production
+    try:
+        for name, method, url, form, status in route_list:
+            data = dict(form, csrf_token=token) if isinstance(form, dict) else form
+
+            def call():
+                target = url() if callable(url) else url
+                response = getattr(client, method)(target, data=data)
+                # streamed responses only finish rendering once read
+                response.get_data()
+                # a form that fails validation is rendered again with a 200,
+                # so the writes check for their redirect
+                assert response.status_code == status, (name, response.status_code)
+
+            stats = measure(call, db.engine, repeat)
+            report(name, stats)
+            results[name] = stats
+    finally:
+        with app.app_context():
+            cleanup_throwaway()
+
+    with open(output, 'w') as baseline:
+        json.dump(results, baseline, indent=2, sort_keys=True)
+    print('Baseline written to ' + output)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:3]
+    main(*(args[:1] + [int(arg) for arg in args[1:]]))
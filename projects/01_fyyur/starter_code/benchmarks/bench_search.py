@@ -0,0 +1,80 @@
+#----------------------------------------------------------------------------#
+# Compares the trigram search against the previous name ilike scan on a
+# synthetic catalog. The seeded rows are removed again when the run ends.
+#
+#   $ flask db upgrade
+#   $ python -m benchmarks.bench_search [rows] [repeat]
+#----------------------------------------------------------------------------#
+
+import sys
+from sqlalchemy import text
+
+from app import app, db
+from search import search
+from benchmarks.common import measure, report
+
+BENCH_MARKER = 'fyyur-bench-search'
+TARGET_P95_MS = 10.0
+TERMS = ['hop', 'music', 'jazz', 'san francisco, ca', 'zzqx']
+
+SEED_SQL = """
+    INSERT INTO public."{table}"
+    (name, city, state, phone, genres, seeking_description)
+    select
+    (array['The Musical', 'Park Square', 'Blue Note', 'Hop House', 'Dueling'])[1 + i % 5]
+        || ' ' || md5(i::text),
+    (array['San Francisco', 'New York', 'Chicago', 'Austin', 'Seattle'])[1 + i % 5],
+    (array['CA', 'NY', 'IL', 'TX', 'WA'])[1 + i % 5],
+    '555-000-0000',
+    string_to_array((array['Jazz', 'Rock n Roll', 'Classical,Folk', 'Hip-Hop', 'Blues,Soul'])[1 + i % 7 % 5], ','),
+    :marker
+    from generate_series(1, :rows) as i
+    """
+
+CLEANUP_SQL = 'DELETE FROM public."{table}" where seeking_description = :marker'
+
+
+def legacy_search(table, search_term):
+    # The implementation the search routes used before search.py
+    sql = text('select * FROM public."{}" where name ilike :search_string'.format(table))
+    results = db.engine.execute(sql, search_string='%'+search_term+'%').fetchall()
+    return {
+        "count": len(results),
+        "data": [{"id": row.id, "name": row.name} for row in results]
+    }
+
+
+def seed(table, rows):
+    # Venue and Artist share every seeded column, so one statement serves both
+    db.engine.execute(text(SEED_SQL.format(table=table)), rows=rows, marker=BENCH_MARKER)
+    db.engine.execute(text('ANALYZE public."{}"'.format(table)))
+
+
+def cleanup(table):
+    db.engine.execute(text(CLEANUP_SQL.format(table=table)), marker=BENCH_MARKER)
+
+
+def main(rows=1000000, repeat=20):
+    # exits non-zero when a search misses TARGET_P95_MS
+    missed = []
+    with app.app_context():
+        for table in ('Venue', 'Artist'):
+            seed(table, rows)
+            try:
+                for term in TERMS:
+                    legacy = measure(lambda: legacy_search(table, term), db.engine, repeat)
+                    ranked = measure(lambda: search(table, term), db.engine, repeat)
+                    report('{} legacy "{}"'.format(table, term), legacy)
+                    report('{} search "{}"'.format(table, term), ranked)
+                    if ranked['p95_ms'] > TARGET_P95_MS:
+                        print('  !! p95 above the {}ms target'.format(TARGET_P95_MS))
+                        missed.append('{} "{}"'.format(table, term))
+            finally:
+                cleanup(table)
+
+    if missed:
+        sys.exit('p95 above {}ms for {}'.format(TARGET_P95_MS, ', '.join(missed)))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
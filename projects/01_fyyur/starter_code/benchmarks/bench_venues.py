@@ -0,0 +1,39 @@
+#----------------------------------------------------------------------------#
+# Compares the /venues directory query against the previous N+1 version.
+#
+#   $ python -m benchmarks.bench_venues [repeat]
+#----------------------------------------------------------------------------#
+
+import sys
+from sqlalchemy import text
+
+from app import app, db
+from directory import venue_directory
+from benchmarks.common import measure, report
+
+
+def legacy_venue_directory():
+    # The implementation /venues used before directory.py: one query for the
+    # city/state groups and then one query per group.
+    sql = text('select city, state FROM public."Venue" GROUP BY city, state ORDER BY city')
+    venue_groups = db.engine.execute(sql).fetchall()
+    data = []
+    for venue_group in venue_groups:
+        sql2 = text("""select * FROM public."Venue" where city = :city_name""")
+        venues = db.engine.execute(sql2, city_name=venue_group[0]).fetchall()
+        data.append({
+            "city": venue_group[0],
+            "state": venue_group[1],
+            "venues": [{"id": venue.id, "name": venue.name} for venue in venues]
+        })
+    return data
+
+
+def main(repeat=20):
+    with app.app_context():
+        report('legacy (n+1)', measure(legacy_venue_directory, db.engine, repeat))
+        report('venue_directory', measure(venue_directory, db.engine, repeat))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
@@ -0,0 +1,62 @@
+#----------------------------------------------------------------------------#
+# Shared helpers for the Fyyur benchmarks.
+#
+# Run the benchmarks from the starter_code folder so that app.py and the
+# helpers are importable, e.g.
+#   $ python -m benchmarks.bench_venues
+#----------------------------------------------------------------------------#
+
+import time
+from sqlalchemy import event
+
+
+class QueryCounter(object):
+    # Counts every statement sent to the database while it is active.
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn, engine, repeat=20):
+    # Runs fn() `repeat` times, returns latency stats in milliseconds
+    # and the number of queries issued by a single call.
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with QueryCounter(engine) as counter:
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = counter.count
+
+    return {
+        'queries': queries,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def report(name, stats):
+    print('{:<28} queries={:<6} p50={:>9.3f}ms p95={:>9.3f}ms p99={:>9.3f}ms'.format(
+        name, stats['queries'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms']))
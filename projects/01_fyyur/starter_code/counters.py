@@ -0,0 +1,86 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from sqlalchemy import text
+
+#----------------------------------------------------------------------------#
+# Upcoming show counters.
+#----------------------------------------------------------------------------#
+
+# Venue.num_upcoming_shows and Artist.num_upcoming_shows count the shows that
+# start after ShowCounterClock.rolled_over_at. Inserts, updates and deletes on
+# Show (including COPY and cascades) keep them current through the
+# statement level show_upcoming_counters triggers created in migration
+# d2c1ca0aa005, which apply the per venue and per artist deltas of a
+# statement at once. Time
+# passing is handled by rollover(): it moves the clock forward and takes the
+# shows that started in between off the counters, reading only that slice of
+# the start_time index. Run it periodically, e.g. from cron:
+#
+#   */5 * * * * cd /path/to/starter_code && flask rollover-show-counters
+
+COUNTED_TABLES = (('Venue', 'venue_id'), ('Artist', 'artist_id'))
+
+# Taking the clock row for update makes the trigger, which reads it with
+# FOR SHARE, wait for the rollover to commit.
+LOCK_CLOCK_SQL = text(
+    'select rolled_over_at from public."ShowCounterClock" where id = 1 for update')
+
+# rebuild() also creates the clock row, e.g. after db.create_all()
+SET_CLOCK_SQL = text(
+    'insert into public."ShowCounterClock" (id, rolled_over_at) '
+    'values (1, :now) '
+    'on conflict (id) do update set rolled_over_at = excluded.rolled_over_at')
+
+ROLLOVER_SQL = """
+    update public."{table}" t
+    set num_upcoming_shows = t.num_upcoming_shows - started.num_shows
+    from (
+        select {column}, count(*) as num_shows
+        from public."Show"
+        where start_time > :last and start_time <= :now
+        group by {column}
+    ) started
+    where t.id = started.{column}
+    """
+
+REBUILD_SQL = """
+    update public."{table}" t
+    set num_upcoming_shows = coalesce((
+        select count(*) from public."Show" s
+        where s.{column} = t.id and s.start_time > :now
+    ), 0)
+    """
+
+
+def rollover(db, now=None):
+    # Returns the previous clock value, or None if the clock did not move.
+    if now is None:
+        now = datetime.now()
+    with db.engine.begin() as connection:
+        last = connection.execute(LOCK_CLOCK_SQL).scalar()
+        if last is None:
+            raise ValueError('ShowCounterClock has no row, rebuild the '
+                             'counters first (rollover-show-counters --rebuild)')
+        if now <= last:
+            return None
+        for table, column in COUNTED_TABLES:
+            connection.execute(
+                text(ROLLOVER_SQL.format(table=table, column=column)),
+                last=last, now=now)
+        connection.execute(SET_CLOCK_SQL, now=now)
+    return last
+
+
+def rebuild(db, now=None):
+    # Recomputes every counter from scratch, for repairs and first installs.
+    if now is None:
+        now = datetime.now()
+    with db.engine.begin() as connection:
+        connection.execute(LOCK_CLOCK_SQL)
+        for table, column in COUNTED_TABLES:
+            connection.execute(
+                text(REBUILD_SQL.format(table=table, column=column)), now=now)
+        connection.execute(SET_CLOCK_SQL, now=now)
@@ -0,0 +1,121 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import time
+from flask import current_app, g, has_request_context
+from sqlalchemy import text
+from models import db
+
+#----------------------------------------------------------------------------#
+# Raw SQL data access.
+#----------------------------------------------------------------------------#
+
+# Every raw SQL statement in the app goes through execute() below:
+#   * statement strings are turned into text() constructs once and their
+#     compiled form is cached, instead of being rebuilt on every call
+#   * one pooled connection is checked out per request (or app context) and
+#     reused by every statement, instead of one checkout per
+#     db.engine.execute() call
+#   * the time spent waiting for the pool is measured, logged when it gets
+#     long and reported in a Server-Timing header, so the pool can be sized
+#     for the number of gunicorn workers and threads
+#   * during a web request the connection gets DB_STATEMENT_TIMEOUT, which is
+#     reset before it goes back to the pool, so CLI commands sharing the pool
+#     are not cancelled
+#
+# Pool size, overflow, pre-ping and the statement timeout live in config.py.
+
+_statements = {}
+_compiled_cache = {}
+
+pool_stats = {
+    'checkouts': 0,
+    'total_wait_ms': 0.0,
+    'max_wait_ms': 0.0,
+}
+
+
+def statement(sql):
+    # Accepts a string or a text() construct. Equal SQL maps to one cached
+    # construct, so routes that build text() per request still hit the
+    # compiled cache.
+    key = sql if isinstance(sql, str) else sql.text
+    if key not in _statements:
+        _statements[key] = text(sql) if isinstance(sql, str) else sql
+    return _statements[key]
+
+
+SET_TIMEOUT_SQL = text("select set_config('statement_timeout', :timeout, :local)")
+RESET_TIMEOUT_SQL = text('reset statement_timeout')
+
+
+def limit_statement_time(conn, local=False):
+    # Sets DB_STATEMENT_TIMEOUT on conn during a web request and returns
+    # True when it was set. local=True keeps it to the current transaction,
+    # otherwise unlimit_statement_time() has to reset it before the
+    # connection goes back to the pool.
+    timeout = current_app.config.get('DB_STATEMENT_TIMEOUT')
+    if not timeout or not has_request_context():
+        return False
+    conn.execute(SET_TIMEOUT_SQL, timeout='{:d}ms'.format(timeout),
+                 local=local).scalar()
+    return True
+
+
+def unlimit_statement_time(conn):
+    if not conn.invalidated:
+        conn.execute(RESET_TIMEOUT_SQL)
+
+
+def connection():
+    if 'db_connection' not in g:
+        start = time.perf_counter()
+        conn = db.engine.connect()
+        wait_ms = (time.perf_counter() - start) * 1000
+
+        pool_stats['checkouts'] += 1
+        pool_stats['total_wait_ms'] += wait_ms
+        pool_stats['max_wait_ms'] = max(pool_stats['max_wait_ms'], wait_ms)
+
+        g.db_pool_wait_ms = wait_ms
+        g.db_connection_limited = limit_statement_time(conn)
+        g.db_connection = conn.execution_options(compiled_cache=_compiled_cache)
+    return g.db_connection
+
+
+def execute(sql, **params):
+    return connection().execute(statement(sql), **params)
+
+
+def release(exception=None):
+    conn = g.pop('db_connection', None)
+    if conn is not None:
+        try:
+            if g.pop('db_connection_limited', False):
+                unlimit_statement_time(conn)
+        finally:
+            conn.close()
+
+
+def pool_status():
+    status = dict(pool_stats)
+    status['pool'] = db.engine.pool.status()
+    return status
+
+
+def init_app(app):
+    warn_ms = app.config.get('DB_POOL_WAIT_WARN_MS')
+
+    @app.after_request
+    def report_pool_wait(response):
+        wait_ms = g.get('db_pool_wait_ms')
+        if wait_ms is not None:
+            response.headers.add('Server-Timing', 'db-pool;dur={:.2f}'.format(wait_ms))
+            if warn_ms is not None and wait_ms > warn_ms:
+                app.logger.warning(
+                    'Waited %.1fms for a database connection (%s)',
+                    wait_ms, db.engine.pool.status())
+        return response
+
+    app.teardown_appcontext(release)
@@ -0,0 +1,74 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from itertools import groupby
+from sqlalchemy import text
+import dal
+
+#----------------------------------------------------------------------------#
+# Venue directory.
+#----------------------------------------------------------------------------#
+
+# The whole /venues page comes from a single statement on the Venue table.
+# Upcoming show counts are read from the num_upcoming_shows counter kept up
+# to date by counters.py, and rows come back already ordered by city/state
+# so they can be grouped in one pass.
+VENUE_DIRECTORY_SQL = """
+    select v.city, v.state, v.id, v.name, v.num_upcoming_shows
+    from public."Venue" v
+    {filters}
+    order by v.city, v.state, {order}
+    """
+
+# How venues are ordered inside a city/state group
+VENUE_ORDERS = {
+    'name': 'v.name',
+    'upcoming': 'v.num_upcoming_shows desc, v.name',
+}
+
+# Optional filters. The genre filter is answered from the GIN index on the
+# genres array instead of splitting comma joined strings in python.
+GENRE_FILTER = 'v.genres @> cast(array[:genre] as varchar[])'
+STATE_FILTER = 'v.state = :state'
+
+_statements = {}
+
+
+def _directory_sql(genre, state, sort):
+    key = (genre is not None, state is not None, sort)
+    if key not in _statements:
+        filters = []
+        if genre is not None:
+            filters.append(GENRE_FILTER)
+        if state is not None:
+            filters.append(STATE_FILTER)
+        where = 'where ' + ' and '.join(filters) if filters else ''
+        _statements[key] = text(VENUE_DIRECTORY_SQL.format(
+            filters=where, order=VENUE_ORDERS[sort]))
+    return _statements[key]
+
+
+def venue_directory(genre=None, state=None, sort='name'):
+    if sort not in VENUE_ORDERS:
+        sort = 'name'
+    params = {}
+    if genre is not None:
+        params['genre'] = genre
+    if state is not None:
+        params['state'] = state
+    rows = dal.execute(_directory_sql(genre, state, sort), **params).fetchall()
+
+    data = []
+    for (city, state), venues in groupby(rows, key=lambda row: (row.city, row.state)):
+        data.append({
+            "city": city,
+            "state": state,
+            "venues": [{
+                "id": venue.id,
+                "name": venue.name,
+                "num_upcoming_shows": venue.num_upcoming_shows
+            } for venue in venues]
+        })
+
+    return data
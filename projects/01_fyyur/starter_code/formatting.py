@@ -0,0 +1,53 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime, timezone
+from functools import lru_cache
+import dateutil.parser
+import babel
+import babel.dates
+
+#----------------------------------------------------------------------------#
+# Datetime formatting.
+#----------------------------------------------------------------------------#
+
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+DEFAULT_LOCALE = babel.dates.LC_TIME or 'en_US'
+
+# The same shows are rendered over and over on the list and detail pages,
+# so recent results are kept around. Bounded, so a long show history can't
+# grow it forever.
+FORMATTED_CACHE_SIZE = 4096
+
+
+@lru_cache(maxsize=None)
+def _compiled_pattern(pattern):
+    return babel.dates.parse_pattern(pattern)
+
+
+@lru_cache(maxsize=None)
+def _locale(name):
+    return babel.Locale.parse(name)
+
+
+@lru_cache(maxsize=FORMATTED_CACHE_SIZE)
+def _format(value, pattern, locale):
+    if value.tzinfo is None:
+        # babel.dates.format_datetime reads naive datetimes as UTC and
+        # formats them in UTC, so they are printed unchanged
+        value = value.replace(tzinfo=timezone.utc)
+    return _compiled_pattern(pattern).apply(value, _locale(locale))
+
+
+def format_datetime(value, format='medium', locale=DEFAULT_LOCALE):
+    # Accepts datetime objects straight from the database. Strings are still
+    # parsed for callers that hand in str(show.start_time).
+    if not isinstance(value, datetime):
+        value = dateutil.parser.parse(value)
+    pattern = DATETIME_FORMATS.get(format, format)
+    return _format(value, pattern, locale)
@@ -0,0 +1,52 @@
+"""store genres as an indexed array
+
+Revision ID: cc18283f55ca
+Revises: d19a2a7943a3
+Create Date: 2026-10-18 10:41:07.502931
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'cc18283f55ca'
+down_revision = 'd19a2a7943a3'
+branch_labels = None
+depends_on = None
+
+TABLES = ['Venue', 'Artist']
+
+
+def upgrade():
+    for table in TABLES:
+        # the trigram index on the comma joined string goes away with the column
+        op.drop_index('ix_{}_genres_trgm'.format(table.lower()), table_name=table)
+        op.add_column(table, sa.Column(
+            'genres_list', postgresql.ARRAY(sa.String(length=120)), nullable=True))
+        # backfill: 'Jazz,Reggae' -> {Jazz,Reggae}
+        op.execute(
+            'UPDATE "{}" SET genres_list = '
+            "string_to_array(genres, ',')".format(table))
+        op.drop_column(table, 'genres')
+        op.alter_column(table, 'genres_list', new_column_name='genres',
+                        nullable=False)
+        op.create_index('ix_{}_genres'.format(table.lower()), table, ['genres'],
+                        unique=False, postgresql_using='gin')
+
+
+def downgrade():
+    for table in TABLES:
+        op.drop_index('ix_{}_genres'.format(table.lower()), table_name=table)
+        op.add_column(table, sa.Column(
+            'genres_string', sa.String(length=120), nullable=True))
+        op.execute(
+            'UPDATE "{}" SET genres_string = '
+            "array_to_string(genres, ',')".format(table))
+        op.drop_column(table, 'genres')
+        op.alter_column(table, 'genres_string', new_column_name='genres',
+                        nullable=False)
+        op.execute(
+            'CREATE INDEX ix_{}_genres_trgm ON "{}" '
+            'USING gin (genres gin_trgm_ops)'.format(table.lower(), table))
@@ -0,0 +1,40 @@
+"""trigram search indexes on venues and artists
+
+Revision ID: d19a2a7943a3
+Revises: a08e1d577ec7
+Create Date: 2026-10-18 09:12:40.118204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd19a2a7943a3'
+down_revision = 'a08e1d577ec7'
+branch_labels = None
+depends_on = None
+
+# state is two letters, too short for trigrams to narrow anything down
+SEARCH_COLUMNS = {
+    'Venue': ['name', 'city', 'genres'],
+    'Artist': ['name', 'city', 'genres'],
+}
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.execute(
+                'CREATE INDEX ix_{}_{}_trgm ON "{}" '
+                'USING gin ({} gin_trgm_ops)'.format(
+                    table.lower(), column, table, column)
+            )
+
+
+def downgrade():
+    for table, columns in SEARCH_COLUMNS.items():
+        for column in columns:
+            op.drop_index('ix_{}_{}_trgm'.format(table.lower(), column),
+                          table_name=table)
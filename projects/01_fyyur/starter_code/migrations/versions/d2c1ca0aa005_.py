@@ -0,0 +1,103 @@
+"""materialized upcoming show counters
+
+Revision ID: d2c1ca0aa005
+Revises: b17966e5e4ba
+Create Date: 2026-10-18 12:03:26.611480
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2c1ca0aa005'
+down_revision = 'b17966e5e4ba'
+branch_labels = None
+depends_on = None
+
+# Statement level: the rows a statement touched are read from its transition
+# tables and every venue and artist is updated once per statement, with the
+# number of its upcoming shows that were removed (old_shows) or added
+# (new_shows). Postgres only allows transition tables on single event
+# triggers, so there is one trigger per event, all calling this function.
+COUNTER_DELTA_SQL = """
+        UPDATE "{table}" t
+        SET num_upcoming_shows = t.num_upcoming_shows {sign} changed.num_shows
+        FROM (
+            SELECT {column}, count(*) AS num_shows FROM {shows}
+            WHERE start_time > horizon GROUP BY {column}
+        ) changed
+        WHERE t.id = changed.{column};"""
+
+
+def counter_deltas(shows, sign):
+    return ''.join(
+        COUNTER_DELTA_SQL.format(table=table, column=column, shows=shows,
+                                 sign=sign)
+        for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')))
+
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION show_upcoming_counters() RETURNS trigger AS $$
+DECLARE
+    horizon timestamp;
+BEGIN
+    SELECT rolled_over_at INTO horizon
+    FROM "ShowCounterClock" WHERE id = 1 FOR SHARE;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN{removed}
+    END IF;
+
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN{added}
+    END IF;
+
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""".format(removed=counter_deltas('old_shows', '-'),
+           added=counter_deltas('new_shows', '+'))
+
+TRIGGERS = (
+    ('show_upcoming_counters_insert', 'INSERT', 'NEW TABLE AS new_shows'),
+    ('show_upcoming_counters_update', 'UPDATE',
+     'OLD TABLE AS old_shows NEW TABLE AS new_shows'),
+    ('show_upcoming_counters_delete', 'DELETE', 'OLD TABLE AS old_shows'),
+)
+
+
+def upgrade():
+    op.create_table('ShowCounterClock',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('rolled_over_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute('INSERT INTO "ShowCounterClock" (id, rolled_over_at) '
+               'VALUES (1, localtimestamp)')
+
+    for table, column in (('Venue', 'venue_id'), ('Artist', 'artist_id')):
+        op.add_column(table, sa.Column('num_upcoming_shows', sa.Integer(),
+                                       server_default='0', nullable=False))
+        # backfill from the shows that are upcoming right now
+        op.execute(
+            'UPDATE "{table}" t SET num_upcoming_shows = coalesce(('
+            'SELECT count(*) FROM "Show" s WHERE s.{column} = t.id '
+            'AND s.start_time > (SELECT rolled_over_at FROM "ShowCounterClock")'
+            '), 0)'.format(table=table, column=column))
+
+    op.execute(TRIGGER_FUNCTION)
+    for name, event, transition_tables in TRIGGERS:
+        op.execute(
+            'CREATE TRIGGER {name} AFTER {event} ON "Show" '
+            'REFERENCING {transition_tables} '
+            'FOR EACH STATEMENT EXECUTE PROCEDURE show_upcoming_counters()'
+            .format(name=name, event=event,
+                    transition_tables=transition_tables))
+
+
+def downgrade():
+    for name, event, transition_tables in TRIGGERS:
+        op.execute('DROP TRIGGER {} ON "Show"'.format(name))
+    op.execute('DROP FUNCTION show_upcoming_counters()')
+    op.drop_column('Artist', 'num_upcoming_shows')
+    op.drop_column('Venue', 'num_upcoming_shows')
+    op.drop_table('ShowCounterClock')
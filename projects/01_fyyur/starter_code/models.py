@@ -4,6 +4,7 @@
 
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
+from sqlalchemy.dialects.postgresql import ARRAY
 db = SQLAlchemy()
 
 
@@ -19,9 +20,34 @@ def db_setup(app):
 # Models.
 #----------------------------------------------------------------------------#
 
+GENRES = [
+    'Alternative',
+    'Blues',
+    'Classical',
+    'Country',
+    'Electronic',
+    'Folk',
+    'Funk',
+    'Hip-Hop',
+    'Heavy Metal',
+    'Instrumental',
+    'Jazz',
+    'Musical Theatre',
+    'Pop',
+    'Punk',
+    'R&B',
+    'Reggae',
+    'Rock n Roll',
+    'Soul',
+    'Other',
+]
+
 
 class Venue(db.Model):
     __tablename__ = 'Venue'
+    __table_args__ = (
+        db.Index('ix_venue_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
@@ -32,9 +58,14 @@ class Venue(db.Model):
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
-    genres = db.Column(db.String(120), nullable=False)
+    # genres are a postgres array with a GIN index, so genre filters
+    # (genres @> array['Jazz']) are answered from the index
+    genres = db.Column(ARRAY(db.String(120)), nullable=False)
     seeking_talent = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500))
+    # maintained by the show_upcoming_counters triggers, see counters.py
+    num_upcoming_shows = db.Column(db.Integer, nullable=False, default=0,
+                                   server_default='0')
     shows = db.relationship('Show', backref='venue',
                             lazy=True, passive_deletes=True)
 
@@ -43,18 +74,23 @@ class Venue(db.Model):
 
 class Artist(db.Model):
     __tablename__ = 'Artist'
+    __table_args__ = (
+        db.Index('ix_artist_genres', 'genres', postgresql_using='gin'),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String)
     city = db.Column(db.String(120))
     state = db.Column(db.String(120))
     phone = db.Column(db.String(120))
-    genres = db.Column(db.String(120), nullable=False)
+    genres = db.Column(ARRAY(db.String(120)), nullable=False)
     image_link = db.Column(db.String(500))
     facebook_link = db.Column(db.String(120))
     website = db.Column(db.String(120))
     seeking_venue = db.Column(db.Boolean, default=False)
     seeking_description = db.Column(db.String(500))
+    num_upcoming_shows = db.Column(db.Integer, nullable=False, default=0,
+                                   server_default='0')
     shows = db.relationship('Show', backref='artist',
                             lazy=True, passive_deletes=True)
 
@@ -65,6 +101,10 @@ class Artist(db.Model):
 
 class Show(db.Model):
     __tablename__ = 'Show'
+    # backs the keyset pagination and the upcoming only filter on /shows
+    __table_args__ = (
+        db.Index('ix_show_start_time_id', 'start_time', 'id'),
+    )
     id = db.Column(db.Integer, primary_key=True, autoincrement=True)
     venue_id = db.Column(db.Integer, db.ForeignKey(
         'Venue.id', ondelete='CASCADE'), nullable=False)
@@ -72,3 +112,10 @@ class Show(db.Model):
         'Artist.id', ondelete='CASCADE'), nullable=False)
     start_time = db.Column(db.DateTime(), nullable=False)
 
+
+class ShowCounterClock(db.Model):
+    # Single row table. Shows starting after rolled_over_at are counted as
+    # upcoming in Venue/Artist.num_upcoming_shows, see counters.py
+    __tablename__ = 'ShowCounterClock'
+    id = db.Column(db.Integer, primary_key=True)
+    rolled_over_at = db.Column(db.DateTime(), nullable=False)
@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from sqlalchemy import text
+import dal
+from models import GENRES
+
+#----------------------------------------------------------------------------#
+# Venue and artist search.
+#----------------------------------------------------------------------------#
+
+# Name and city have pg_trgm GIN indexes (see migration d19a2a7943a3), so
+# the ilike filters below are answered with a bitmap index scan instead of a
+# sequential scan. States are two letters, which a trigram index cannot
+# help with, so they are only matched for terms of up to two characters;
+# for longer terms :match_state is false and postgres drops that branch.
+# The term is matched against the known genres in python and the hits are
+# looked up through the GIN index on the genres array. Matches are ranked by
+# trigram similarity, best name matches first, and paged in the database.
+SEARCH_SQL = """
+    select id, name, city, state, num_upcoming_shows,
+    greatest(
+        similarity(name, :term) * 2,
+        similarity(city, :term),
+        similarity(state, :term),
+        case when genres && cast(:genres as varchar[]) then 0.5 else 0 end
+    ) as rank
+    from public."{table}"
+    where {condition}
+    order by rank desc, name asc, id asc
+    limit :limit offset :offset
+    """
+
+# The total stops counting at :count_limit matches, so a term matching most
+# of the table does not rank or count every row.
+COUNT_SQL = """
+    select count(*) from (
+        select 1 from public."{table}" where {condition} limit :count_limit
+    ) capped
+    """
+
+TERM_CONDITION = """
+    name ilike :pattern or city ilike :pattern
+    or (:match_state and state ilike :pattern)
+    or genres && cast(:genres as varchar[])
+    """
+
+# "San Francisco, CA" searches by city and state
+CITY_STATE_CONDITION = 'city ilike :city and state ilike :state'
+
+SEARCHABLE_TABLES = ('Venue', 'Artist')
+
+_statements = {}
+
+
+def _statement(sql, table, condition):
+    key = (sql, table, condition)
+    if key not in _statements:
+        _statements[key] = text(sql.format(table=table, condition=condition))
+    return _statements[key]
+
+
+def _like_pattern(term):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return '%' + escaped + '%'
+
+
+def matching_genres(term):
+    term = term.lower()
+    return [genre for genre in GENRES if term and term in genre.lower()]
+
+
+def search(table, search_term, page=1, per_page=20, count_limit=1000):
+    # count is exact up to count_limit (or the end of the requested page,
+    # whichever is larger) and count_capped tells when it stopped there
+    if table not in SEARCHABLE_TABLES:
+        raise ValueError('Unknown search table: ' + table)
+
+    term = search_term.strip()
+    page = max(page, 1)
+    offset = (page - 1) * per_page
+    count_limit = max(count_limit, offset + per_page + 1)
+    params = {
+        'term': term,
+        'genres': matching_genres(term),
+        'limit': per_page,
+        'offset': offset
+    }
+
+    if term.count(',') == 1:
+        city, state = [part.strip() for part in term.split(',')]
+        params['city'] = city
+        params['state'] = state
+        condition = CITY_STATE_CONDITION
+    else:
+        params['pattern'] = _like_pattern(term)
+        params['match_state'] = len(term) <= 2
+        condition = TERM_CONDITION
+
+    rows = dal.execute(
+        _statement(SEARCH_SQL, table, condition), **params).fetchall()
+    if offset == 0 and len(rows) < per_page:
+        # the whole result fits on the first page
+        total = len(rows)
+    else:
+        # one row past the limit tells a capped count from an exact one
+        total = dal.execute(_statement(COUNT_SQL, table, condition),
+                            count_limit=count_limit + 1, **params).scalar()
+    capped = total > count_limit
+    total = min(total, count_limit)
+
+    return {
+        "count": total,
+        "count_capped": capped,
+        "page": page,
+        "pages": (total + per_page - 1) // per_page,
+        "data": [{
+            "id": row.id,
+            "name": row.name,
+            "city": row.city,
+            "state": row.state,
+            "num_upcoming_shows": row.num_upcoming_shows
+        } for row in rows]
+    }
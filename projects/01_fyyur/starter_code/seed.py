@@ -0,0 +1,137 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import random
+from datetime import datetime, timedelta
+from sqlalchemy import text
+from models import GENRES
+from show_import import ShowImporter
+
+#----------------------------------------------------------------------------#
+# Synthetic data generator.
+#----------------------------------------------------------------------------#
+
+# Seeds Venue, Artist and Show rows that look like production rather than
+# uniform noise: a handful of cities hold most of the venues, and a few hot
+# artists and big venues play most of the shows (zipf-like weights). Shows
+# spread from two years back to one year ahead. The same seed always
+# generates the same data.
+
+CITIES = [
+    ('New York', 'NY'), ('Los Angeles', 'CA'), ('San Francisco', 'CA'),
+    ('Chicago', 'IL'), ('Austin', 'TX'), ('Nashville', 'TN'),
+    ('Seattle', 'WA'), ('New Orleans', 'LA'), ('Denver', 'CO'),
+    ('Portland', 'OR'), ('Atlanta', 'GA'), ('Boston', 'MA'),
+    ('Miami', 'FL'), ('Detroit', 'MI'), ('Minneapolis', 'MN'),
+    ('Phoenix', 'AZ'), ('Philadelphia', 'PA'), ('Kansas City', 'MO'),
+]
+
+NAME_WORDS = [
+    'Blue', 'Note', 'Hop', 'Velvet', 'Echo', 'Hall', 'Lounge', 'Garage',
+    'Wild', 'Sax', 'Band', 'Petals', 'Electric', 'Room', 'Station', 'Cellar',
+    'Moon', 'Union', 'Crystal', 'Ballroom', 'Social', 'Club', 'Tavern', 'Sound',
+]
+
+VENUE_COLUMNS = ('name', 'city', 'state', 'address', 'phone', 'genres',
+                 'seeking_talent')
+ARTIST_COLUMNS = ('name', 'city', 'state', 'phone', 'genres', 'seeking_venue')
+
+COPY_SQL = 'COPY public."{}" ({}) FROM STDIN WITH CSV'
+
+
+def zipf_weights(count, exponent=1.1):
+    return [1.0 / (rank ** exponent) for rank in range(1, count + 1)]
+
+
+class Seeder(object):
+
+    def __init__(self, db, seed=42, batch_size=5000):
+        self.db = db
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+        self.city_weights = zipf_weights(len(CITIES))
+
+    def _name(self, suffix):
+        words = self.random.sample(NAME_WORDS, 2)
+        return '{} {} {}'.format(words[0], words[1], suffix)
+
+    def _genres(self):
+        genres = self.random.sample(GENRES, self.random.randint(1, 3))
+        return '{' + ','.join('"{}"'.format(genre) for genre in genres) + '}'
+
+    def _phone(self):
+        return '{:03d}-{:03d}-{:04d}'.format(
+            self.random.randint(200, 999), self.random.randint(0, 999),
+            self.random.randint(0, 9999))
+
+    def _city(self):
+        return self.random.choices(CITIES, weights=self.city_weights)[0]
+
+    def _copy(self, table, columns, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        buffer.seek(0)
+        connection = self.db.engine.raw_connection()
+        try:
+            connection.cursor().copy_expert(
+                COPY_SQL.format(table, ', '.join(columns)), buffer)
+            connection.commit()
+        finally:
+            connection.close()
+
+    def _new_ids(self, table, count):
+        sql = text('select id from public."{}" order by id desc limit :count'.format(table))
+        return [row[0] for row in self.db.engine.execute(sql, count=count)]
+
+    def venues(self, count):
+        rows = []
+        for number in range(count):
+            city, state = self._city()
+            rows.append((self._name('Venue #{}'.format(number)), city, state,
+                         '{} Main St'.format(self.random.randint(1, 9999)),
+                         self._phone(), self._genres(),
+                         self.random.random() < 0.3))
+        self._copy('Venue', VENUE_COLUMNS, rows)
+        return self._new_ids('Venue', count)
+
+    def artists(self, count):
+        rows = []
+        for number in range(count):
+            city, state = self._city()
+            rows.append((self._name('Artist #{}'.format(number)), city, state,
+                         self._phone(), self._genres(),
+                         self.random.random() < 0.3))
+        self._copy('Artist', ARTIST_COLUMNS, rows)
+        return self._new_ids('Artist', count)
+
+    def shows(self, count, venue_ids, artist_ids, now=None):
+        now = now or datetime.now()
+        venue_weights = zipf_weights(len(venue_ids))
+        artist_weights = zipf_weights(len(artist_ids))
+        venues = self.random.choices(venue_ids, weights=venue_weights, k=count)
+        artists = self.random.choices(artist_ids, weights=artist_weights, k=count)
+
+        def rows():
+            for line_num, (venue_id, artist_id) in enumerate(zip(venues, artists), start=1):
+                start_time = now + timedelta(
+                    days=self.random.randint(-730, 365),
+                    hours=self.random.choice([18, 19, 20, 21, 22]) - now.hour,
+                    minutes=-now.minute)
+                yield line_num, {
+                    'venue_id': venue_id,
+                    'artist_id': artist_id,
+                    'start_time': start_time.replace(second=0, microsecond=0).isoformat()
+                }
+
+        return ShowImporter(self.db, batch_size=self.batch_size).run(rows())
+
+    def run(self, venues, artists, shows):
+        venue_ids = self.venues(venues)
+        artist_ids = self.artists(artists)
+        summary = self.shows(shows, venue_ids, artist_ids)
+        for table in ('Venue', 'Artist', 'Show'):
+            self.db.engine.execute(text('ANALYZE public."{}"'.format(table)))
+        return summary
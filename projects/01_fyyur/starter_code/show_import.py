@@ -0,0 +1,125 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+import csv
+import io
+import json
+import dateutil.parser
+import dal
+
+#----------------------------------------------------------------------------#
+# Bulk show import.
+#----------------------------------------------------------------------------#
+
+# Shows are streamed in from CSV (venue_id,artist_id,start_time header) or
+# JSON lines, checked against the venue and artist ids loaded once up front,
+# and written with COPY in large batches. Bad rows are reported back with
+# their line number instead of failing the whole import.
+
+COPY_SQL = 'COPY public."Show" (venue_id, artist_id, start_time) FROM STDIN WITH CSV'
+
+FORMATS = ('csv', 'jsonl')
+
+
+def read_rows(stream, format):
+    # yields (line number, dict or None) pairs. None marks a line that
+    # could not be decoded at all.
+    if format == 'csv':
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif format == 'jsonl':
+        for line_num, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_num, row if isinstance(row, dict) else None
+    else:
+        raise ValueError('Unknown import format: ' + format)
+
+
+class ShowImporter(object):
+
+    def __init__(self, db, batch_size=5000, max_reported_rejects=1000):
+        self.db = db
+        self.batch_size = batch_size
+        self.max_reported_rejects = max_reported_rejects
+        self.venue_ids = self._load_ids('Venue')
+        self.artist_ids = self._load_ids('Artist')
+        self.inserted = 0
+        self.rejected = 0
+        self.rejects = []
+
+    def _load_ids(self, table):
+        sql = 'select id from public."{}"'.format(table)
+        return set(row[0] for row in dal.execute(sql))
+
+    def _reject(self, line_num, reason):
+        self.rejected += 1
+        if len(self.rejects) < self.max_reported_rejects:
+            self.rejects.append({'line': line_num, 'reason': reason})
+
+    def _parse(self, row):
+        # returns a (venue_id, artist_id, start_time) tuple ready for COPY,
+        # or raises ValueError with the reason the row is rejected
+        if row is None:
+            raise ValueError('malformed row')
+        try:
+            venue_id = int(row.get('venue_id'))
+            artist_id = int(row.get('artist_id'))
+        except (TypeError, ValueError):
+            raise ValueError('venue_id and artist_id must be integers')
+        if venue_id not in self.venue_ids:
+            raise ValueError('unknown venue_id {}'.format(venue_id))
+        if artist_id not in self.artist_ids:
+            raise ValueError('unknown artist_id {}'.format(artist_id))
+        try:
+            start_time = dateutil.parser.parse(row.get('start_time'))
+        except (AttributeError, TypeError, ValueError, OverflowError):
+            raise ValueError('invalid start_time')
+        return (venue_id, artist_id, start_time.isoformat(sep=' '))
+
+    def _copy(self, batch):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(batch)
+        buffer.seek(0)
+
+        connection = self.db.engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            cursor.copy_expert(COPY_SQL, buffer)
+            connection.commit()
+        finally:
+            connection.close()
+        self.inserted += len(batch)
+
+    def run(self, rows):
+        batch = []
+        for line_num, row in rows:
+            try:
+                batch.append(self._parse(row))
+            except ValueError as error:
+                self._reject(line_num, str(error))
+                continue
+            if len(batch) >= self.batch_size:
+                self._copy(batch)
+                batch = []
+        if batch:
+            self._copy(batch)
+        return self.summary()
+
+    def summary(self):
+        return {
+            'inserted': self.inserted,
+            'rejected': self.rejected,
+            'rejects': self.rejects
+        }
+
+
+def import_shows(db, stream, format, batch_size=5000):
+    importer = ShowImporter(db, batch_size=batch_size)
+    return importer.run(read_rows(stream, format))
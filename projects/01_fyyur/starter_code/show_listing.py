@@ -0,0 +1,102 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from sqlalchemy import text
+import dal
+
+#----------------------------------------------------------------------------#
+# Keyset paginated show listing.
+#----------------------------------------------------------------------------#
+
+# Pages are addressed by the (start_time, id) of the last show on the previous
+# page instead of an offset, so every page is a range scan on the
+# ix_show_start_time_id index no matter how deep the listing goes.
+SHOW_LISTING_SQL = """
+    select s.id, s.venue_id, s.artist_id, s.start_time,
+    v.name as venue_name, v.image_link as venue_image_link,
+    a.name as artist_name, a.image_link as artist_image_link
+    from public."Show" s
+    join public."Venue" v on s.venue_id = v.id
+    join public."Artist" a on s.artist_id = a.id
+    {filters}
+    order by s.start_time asc, s.id asc
+    limit :limit
+    """
+
+AFTER_FILTER = '(s.start_time, s.id) > (:after_time, :after_id)'
+UPCOMING_FILTER = 's.start_time > :now'
+
+CURSOR_FORMAT = '%Y-%m-%dT%H:%M:%S.%f'
+
+_statements = {}
+
+
+def _listing_sql(after, upcoming):
+    key = (after is not None, upcoming)
+    if key not in _statements:
+        filters = []
+        if after is not None:
+            filters.append(AFTER_FILTER)
+        if upcoming:
+            filters.append(UPCOMING_FILTER)
+        where = 'where ' + ' and '.join(filters) if filters else ''
+        _statements[key] = text(SHOW_LISTING_SQL.format(filters=where))
+    return _statements[key]
+
+
+def encode_cursor(start_time, show_id):
+    return '{}_{}'.format(start_time.strftime(CURSOR_FORMAT), show_id)
+
+
+def decode_cursor(cursor):
+    # raises ValueError on anything that was not produced by encode_cursor()
+    start_time, show_id = cursor.rsplit('_', 1)
+    return datetime.strptime(start_time, CURSOR_FORMAT), int(show_id)
+
+
+class ShowPage(object):
+    # One page of /shows. Rows are fetched through a server side cursor while
+    # the page is iterated, so a streamed template can send the first shows
+    # before the last ones have left the database. next_cursor is known once
+    # iteration is over, which is where the template renders the pager.
+
+    def __init__(self, db, after=None, upcoming=False, per_page=30, now=None):
+        self.db = db
+        self.after = decode_cursor(after) if after else None
+        self.upcoming = upcoming
+        self.per_page = per_page
+        self.now = now or datetime.now()
+        self.next_cursor = None
+
+    def __iter__(self):
+        params = {'limit': self.per_page + 1}
+        if self.after is not None:
+            params['after_time'], params['after_id'] = self.after
+        if self.upcoming:
+            params['now'] = self.now
+
+        connection = self.db.engine.connect().execution_options(stream_results=True)
+        # the streamed rows are read in one transaction, the timeout ends with it
+        dal.limit_statement_time(connection, local=True)
+        try:
+            rows = connection.execute(_listing_sql(self.after, self.upcoming), **params)
+            last = None
+            for count, row in enumerate(rows):
+                if count == self.per_page:
+                    # there is at least one more row, so there is a next page
+                    self.next_cursor = encode_cursor(last.start_time, last.id)
+                    break
+                last = row
+                yield {
+                    "venue_id": row.venue_id,
+                    "venue_name": row.venue_name,
+                    "venue_image_link": row.venue_image_link,
+                    "artist_id": row.artist_id,
+                    "artist_name": row.artist_name,
+                    "artist_image_link": row.artist_image_link,
+                    "start_time": row.start_time
+                }
+        finally:
+            connection.close()
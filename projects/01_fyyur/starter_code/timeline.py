@@ -0,0 +1,91 @@
+#----------------------------------------------------------------------------#
+# Imports
+#----------------------------------------------------------------------------#
+
+from datetime import datetime
+from sqlalchemy import text
+import dal
+
+#----------------------------------------------------------------------------#
+# Show timeline.
+#----------------------------------------------------------------------------#
+
+# Past and upcoming shows for a venue or an artist come back from one joined
+# query. The partition counts are computed with window functions, so they stay
+# correct even when the past shows are cut down to the most recent ones.
+TIMELINE_SQL = """
+    select * from (
+        select s.venue_id, s.artist_id, s.start_time,
+        v.name as venue_name, v.image_link as venue_image_link,
+        a.name as artist_name, a.image_link as artist_image_link,
+        s.start_time > :now as upcoming,
+        count(*) over (partition by s.start_time > :now) as partition_count,
+        row_number() over (partition by s.start_time > :now
+                           order by s.start_time desc) as recency
+        from public."Show" s
+        join public."Venue" v on s.venue_id = v.id
+        join public."Artist" a on s.artist_id = a.id
+        where s.{column} = :entity_id and s.start_time <> :now
+    ) timeline
+    {past_filter}
+    order by start_time asc
+    """
+
+PAST_LIMIT_FILTER = 'where upcoming or recency <= :past_limit'
+
+_statements = {}
+
+
+def _timeline_sql(column, limited):
+    key = (column, limited)
+    if key not in _statements:
+        _statements[key] = text(TIMELINE_SQL.format(
+            column=column,
+            past_filter=PAST_LIMIT_FILTER if limited else ''))
+    return _statements[key]
+
+
+def _show_row(row):
+    return {
+        "venue_id": row.venue_id,
+        "venue_name": row.venue_name,
+        "venue_image_link": row.venue_image_link,
+        "artist_id": row.artist_id,
+        "artist_name": row.artist_name,
+        "artist_image_link": row.artist_image_link,
+        "start_time": row.start_time
+    }
+
+
+def show_timeline(venue_id=None, artist_id=None, past_limit=None, now=None):
+    if (venue_id is None) == (artist_id is None):
+        raise ValueError('show_timeline needs exactly one of venue_id or artist_id')
+    if now is None:
+        now = datetime.now()
+
+    if venue_id is not None:
+        column, entity_id = 'venue_id', venue_id
+    else:
+        column, entity_id = 'artist_id', artist_id
+
+    params = {'now': now, 'entity_id': entity_id}
+    if past_limit is not None:
+        params['past_limit'] = past_limit
+    rows = dal.execute(
+        _timeline_sql(column, past_limit is not None), **params).fetchall()
+
+    timeline = {
+        "past_shows": [],
+        "upcoming_shows": [],
+        "past_shows_count": 0,
+        "upcoming_shows_count": 0,
+    }
+    for row in rows:
+        if row.upcoming:
+            timeline["upcoming_shows"].append(_show_row(row))
+            timeline["upcoming_shows_count"] = row.partition_count
+        else:
+            timeline["past_shows"].append(_show_row(row))
+            timeline["past_shows_count"] = row.partition_count
+
+    return timeline
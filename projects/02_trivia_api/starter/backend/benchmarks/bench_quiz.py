@@ -0,0 +1,46 @@
+import random
+import sys
+
+from models import Question
+from flaskr.quiz import draw_question
+from benchmarks.common import bench_app, seed, measure, report
+
+
+'''
+Compares draw_question() against the previous /quizzes implementation,
+which loaded and formatted every remaining question of the category.
+
+    python -m benchmarks.bench_quiz [questions] [repeat]
+'''
+
+
+def legacy_draw_question(category_id, previous_questions):
+    if category_id == 0:
+        selection = Question.query.filter(
+            Question.id.notin_(previous_questions)).all()
+    else:
+        selection = Question.query.filter(Question.category == category_id,
+                                          Question.id.notin_(previous_questions)).all()
+    questions = [q.format() for q in selection]
+    if len(questions) != 0:
+        return random.choice(questions)
+
+
+def main(questions=100000, repeat=50):
+    app = bench_app()
+    with app.app_context():
+        seed(questions)
+        ids = [row[0] for row in Question.query.with_entities(Question.id)]
+        # a long quiz session: 200 questions already played
+        previous = random.Random(7).sample(ids, 200)
+
+        for category_id in (0, 4):
+            name = 'all categories' if category_id == 0 else 'category {}'.format(category_id)
+            report('legacy ' + name, measure(
+                lambda: legacy_draw_question(category_id, previous), repeat))
+            report('draw_question ' + name, measure(
+                lambda: draw_question(category_id, previous), repeat))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,50 @@
+import sys
+
+from models import Question
+from flaskr.search import search_questions
+from benchmarks.common import bench_app, seed, measure, report
+
+
+'''
+Compares search_questions() against the previous /questions/search query,
+an unindexed ILIKE sorted by question text, at growing table sizes.
+The trigram index only exists in Postgres, so set BENCH_DATABASE_PATH for
+numbers that mean something.
+
+    python -m benchmarks.bench_search [repeat] [sizes...]
+'''
+
+TERMS = ['title', 'river', 'oscar planet']
+PER_PAGE = 10
+
+
+def legacy_search(search_term):
+    return Question.query.filter(Question.question.ilike(
+        '%{}%'.format(search_term))).order_by(Question.question)
+
+
+def first_page(selection):
+    # what question_search() loads: one page and the total
+    selection.limit(PER_PAGE).all()
+    return selection.order_by(None).count()
+
+
+def main(repeat=20, sizes=(10000, 100000, 1000000)):
+    app = bench_app()
+    with app.app_context():
+        for size in sizes:
+            seed(size)
+            for term in TERMS:
+                name = '{} "{}"'.format(size, term)
+                report('legacy ' + name, measure(
+                    lambda: first_page(legacy_search(term)), repeat))
+                report('search ' + name, measure(
+                    lambda: first_page(search_questions(term)), repeat))
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:]]
+    if len(args) > 1:
+        main(args[0], args[1:])
+    else:
+        main(*args)
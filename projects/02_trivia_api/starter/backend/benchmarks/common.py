@@ -0,0 +1,105 @@
+import os
+import random
+import tempfile
+import time
+from sqlalchemy import event
+
+from flaskr import create_app
+from models import db, Question, Category, QuestionStat
+
+
+'''
+Shared helpers for the trivia benchmarks.
+
+Run them from the backend folder, e.g.
+    python -m benchmarks.bench_quiz
+
+By default every benchmark seeds a throwaway SQLite database, set
+BENCH_DATABASE_PATH to point them at a local Postgres database instead.
+'''
+
+CATEGORIES = ['Science', 'Art', 'Geography', 'History', 'Entertainment', 'Sports']
+WORDS = ['title', 'capital', 'river', 'painter', 'movie', 'oscar', 'planet',
+         'element', 'king', 'war', 'goal', 'album', 'novel', 'bridge', 'desert']
+
+
+def bench_app():
+    path = os.environ.get('BENCH_DATABASE_PATH')
+    if path is None:
+        handle, filename = tempfile.mkstemp(suffix='.db', prefix='trivia_bench_')
+        os.close(handle)
+        path = 'sqlite:///' + filename
+    return create_app({'database_path': path})
+
+
+def seed(count, seed=42):
+    # replaces every category and question with `count` generated questions
+    rng = random.Random(seed)
+    Question.query.delete()
+    Category.query.delete()
+    db.session.commit()
+
+    db.session.bulk_insert_mappings(Category, [
+        {'id': number, 'type': name}
+        for number, name in enumerate(CATEGORIES, start=1)])
+    for start in range(0, count, 10000):
+        db.session.bulk_insert_mappings(Question, [{
+            'question': 'Which {} {} the {} #{}?'.format(*rng.sample(WORDS, 3), number),
+            'answer': ' '.join(rng.sample(WORDS, 2)),
+            'category': rng.randint(1, len(CATEGORIES)),
+            'difficulty': rng.randint(1, 5)
+        } for number in range(start, min(start + 10000, count))])
+    db.session.commit()
+    QuestionStat.rebuild()
+
+
+class QueryCounter(object):
+    # counts every statement sent to the database while it is active
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _on_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+
+    def __enter__(self):
+        self.count = 0
+        event.listen(self.engine, 'before_cursor_execute', self._on_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._on_execute)
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn, repeat=20):
+    # latency percentiles in milliseconds and the most queries a single
+    # call issued
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with QueryCounter(db.engine) as counter:
+            start = time.perf_counter()
+            fn()
+            timings.append((time.perf_counter() - start) * 1000)
+        queries = max(queries, counter.count)
+
+    return {
+        'queries': queries,
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def report(name, stats):
+    print('{:<34} queries={:<4} p50={:>9.3f}ms p95={:>9.3f}ms p99={:>9.3f}ms'.format(
+        name, stats['queries'], stats['p50_ms'], stats['p95_ms'], stats['p99_ms']))
@@ -1,28 +1,88 @@
 import os
-from flask import Flask, request, abort, jsonify
+import io
+import json
+import hashlib
+import click
+from flask import (Flask, Response, request, abort, jsonify,
+                   stream_with_context)
 from flask_sqlalchemy import SQLAlchemy
 from flask_cors import CORS
-import random
 
-from models import setup_db, Question, Category
+from models import setup_db, database_path, Question, Category, QuestionStat
+from .cache import CachedValue, invalidate_on_commit
+from .quiz import draw_question
+from .search import search_questions
+from .sessions import QuizSessions
+from .transfer import FORMATS, import_questions, export_questions
 
 QUESTIONS_PER_PAGE = 10
+# seconds the total number of questions is served from cache
+QUESTION_COUNT_TTL = 30
+# seconds categories are served from cache, writes to the table drop it
+# right away
+CATEGORY_TTL = 300
+# questions inserted per INSERT and commit by the bulk import
+IMPORT_BATCH_SIZE = 1000
+# questions read per query by the export
+EXPORT_BATCH_SIZE = 1000
+# quiz sessions kept in memory, the least recently played are dropped first
+QUIZ_SESSIONS = 1000
+
+
+def paginate(request, query):
+    # LIMIT/OFFSET runs in the database, only the rows on the page
+    # are loaded and formatted
+    page = max(request.args.get('page', 1, type=int), 1)
+    start = (page - 1) * QUESTIONS_PER_PAGE
+    selection = query.limit(QUESTIONS_PER_PAGE).offset(start).all()
 
+    return [result.format() for result in selection]
+
+
+def count(query):
+    # separate COUNT query, without the ORDER BY of the page query
+    return query.order_by(None).count()
 
-def paginate(request, selected):
-    page = request.args.get('page', 1, type=int)
-    start = (page - 1) * QUESTIONS_PER_PAGE
-    end = start + QUESTIONS_PER_PAGE
-    results = [result.format() for result in selected]
-    current_selection = results[start:end]
 
-    return current_selection
+def include_page(request):
+    # write endpoints only return a page of questions when asked for one
+    # with ?include=page
+    return 'page' in request.args.get('include', '').split(',')
+
+
+def load_categories():
+    # every category ordered by id, indexed by id, and the ETag of /categories
+    categories = [c.format() for c in Category.query.order_by(Category.id)]
+    by_type = sorted(categories, key=lambda c: c['type'])
+    etag = hashlib.sha1(json.dumps(
+        [[c['id'], c['type']] for c in by_type]).encode('utf-8')).hexdigest()
+
+    return {
+        'list': categories,
+        'by_id': {c['id']: c for c in categories},
+        'by_type': by_type,
+        'etag': etag
+    }
 
 
 def create_app(test_config=None):
     # create and configure the app
     app = Flask(__name__)
-    setup_db(app)
+    if test_config is None:
+        setup_db(app)
+    else:
+        # e.g. create_app({'database_path': 'sqlite:///bench.db'})
+        setup_db(app, test_config.get('database_path', database_path))
+
+    # total_questions of the unfiltered listing, kept current on insert and
+    # delete, reloaded after bulk imports and once the ttl runs out
+    question_count = CachedValue(
+        lambda: Question.query.count(), ttl=QUESTION_COUNT_TTL)
+    # categories of the list endpoints, no category query in steady state
+    categories = CachedValue(load_categories, ttl=CATEGORY_TTL)
+    invalidate_on_commit(app, Category, categories)
+    app.category_cache = categories
+    quiz_sessions = QuizSessions(capacity=QUIZ_SESSIONS)
 
     '''
     DONE @TODO: Set up CORS. Allow '*' for origins. Delete the sample route after completing the TODOs
@@ -49,18 +109,26 @@ def create_app(test_config=None):
     '''
     @app.route('/categories', methods=['GET'])
     def get_categories():
-        selection = Category.query.order_by(Category.type).all()
-        categs = {categ.id: categ.type for categ in selection}
+        cached = categories.get()
+        selection = cached['by_type']
 
         if len(selection) == 0:
             abort(404)
 
-        return jsonify({
+        if cached['etag'] in request.if_none_match:
+            response = app.response_class(status=304)
+            response.set_etag(cached['etag'])
+            return response
+
+        categs = {categ['id']: categ['type'] for categ in selection}
+        response = jsonify({
             'success': True,
             'categories': categs,
             'total_categories': len(selection)
 
         })
+        response.set_etag(cached['etag'])
+        return response
 
     '''
     DONE @TODO: 
@@ -77,21 +145,21 @@ def create_app(test_config=None):
     @app.route('/questions', methods=['GET'])
     def get_questions():
         try:
-            selection = Question.query.order_by(Question.id).all()
-            paginated_questions = paginate(request, selection)
-            categories = Category.query.order_by(Category.id).all()
+            paginated_questions = paginate(
+                request, Question.query.order_by(Question.id))
+            categs = categories.get()['list']
 
             if len(paginated_questions) == 0:
                 abort(404)
 
-            full_list = [c.type for c in categories]
+            full_list = [c['type'] for c in categs]
 
             return jsonify({
                 'success': True,
                 'questions': paginated_questions,
                 'categories': full_list,
-                'current_category': categories[0].type,
-                'total_questions': len(selection)
+                'current_category': categs[0]['type'],
+                'total_questions': question_count.get()
             })
 
         except:
@@ -115,15 +183,18 @@ def create_app(test_config=None):
                 abort(404)
 
             question.delete()
-            selection = Question.query.order_by(Question.id).all()
-            current_questions = paginate(request, selection)
+            question_count.adjust(-1)
 
-            return jsonify({
+            result = {
                 'success': True,
                 'deleted': question_id,
-                'questions': current_questions,
-                'total_questions': len(selection)
-            })
+                'total_questions': question_count.get()
+            }
+            if include_page(request):
+                result['questions'] = paginate(
+                    request, Question.query.order_by(Question.id))
+
+            return jsonify(result)
 
         except:
             abort(422)
@@ -151,20 +222,129 @@ def create_app(test_config=None):
 
         try:
             q = Question(question=new_question, answer=new_answer,
-                         category=new_category, difficulty=new_difficulty)
+                         category=int(new_category),
+                         difficulty=new_difficulty)
             q.insert()
-            selection = Question.query.order_by(Question.id).all()
-            paginated_questions = paginate(request, selection)
+            question_count.adjust(1)
 
-            return jsonify({
+            result = {
                 'success': True,
                 'created': q.id,
+                'total_questions': question_count.get()
+            }
+            if include_page(request):
+                result['questions'] = paginate(
+                    request, Question.query.order_by(Question.id))
 
-            })
+            return jsonify(result)
 
         except:
             abort(422)
 
+    '''
+    Bulk import and export, see transfer.py. The import streams a CSV
+    (text/csv) or JSON lines body into the table and responds with the
+    inserted and rejected counts, the export streams every question back.
+    '''
+    @app.route('/questions/import', methods=['POST'])
+    def import_questions_submission():
+        format = request.args.get('format')
+        if format is None:
+            format = 'csv' if request.mimetype == 'text/csv' else 'jsonl'
+        if format not in FORMATS:
+            abort(400)
+
+        stream = io.TextIOWrapper(request.stream, encoding='utf-8')
+        try:
+            summary = import_questions(stream, format,
+                                       batch_size=IMPORT_BATCH_SIZE)
+        except ValueError:
+            # CSV without the required header
+            abort(400)
+        finally:
+            question_count.invalidate()
+
+        return jsonify(dict(summary, success=True))
+
+    @app.route('/questions/export', methods=['GET'])
+    def export_questions_download():
+        format = request.args.get('format', 'jsonl')
+        if format not in FORMATS:
+            abort(400)
+
+        mimetype = 'text/csv' if format == 'csv' else 'application/x-ndjson'
+        return Response(stream_with_context(
+            export_questions(format, batch_size=EXPORT_BATCH_SIZE)),
+                        mimetype=mimetype)
+
+    @app.cli.command('import-questions')
+    @click.argument('path', type=click.Path(exists=True, dir_okay=False))
+    @click.option('--format', type=click.Choice(FORMATS), default=None,
+                  help='Defaults to the file extension.')
+    @click.option('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+    def import_questions_command(path, format, batch_size):
+        """Bulk import questions from a CSV or JSON lines file."""
+        if format is None:
+            format = 'csv' if path.endswith('.csv') else 'jsonl'
+        with open(path, encoding='utf-8', newline='') as stream:
+            try:
+                summary = import_questions(stream, format,
+                                           batch_size=batch_size)
+            except ValueError as error:
+                raise click.ClickException(str(error))
+
+        for reject in summary['rejects']:
+            click.echo('line {line}: {reason}'.format(**reject), err=True)
+        click.echo('{} questions imported, {} rejected'.format(
+            summary['inserted'], summary['rejected']))
+
+    @app.cli.command('export-questions')
+    @click.argument('path', default='-')
+    @click.option('--format', type=click.Choice(FORMATS), default='jsonl')
+    def export_questions_command(path, format):
+        """Write every question to a CSV or JSON lines file (- for stdout)."""
+        with click.open_file(path, 'w', encoding='utf-8') as output:
+            for chunk in export_questions(format,
+                                          batch_size=EXPORT_BATCH_SIZE):
+                output.write(chunk)
+
+    '''
+    Question counts per category and difficulty, read from the
+    question_stats summary table (see models.py), so the cost does not
+    depend on the number of questions.
+    '''
+    @app.route('/stats', methods=['GET'])
+    def get_stats():
+        categs = categories.get()['by_id']
+        by_category = {}
+        by_difficulty = {}
+        total = 0
+
+        for stat in QuestionStat.query.filter(QuestionStat.count > 0):
+            total += stat.count
+            by_difficulty[stat.difficulty] = \
+                by_difficulty.get(stat.difficulty, 0) + stat.count
+            entry = by_category.setdefault(stat.category, {
+                'type': categs.get(stat.category, {}).get('type'),
+                'total': 0,
+                'difficulties': {}
+            })
+            entry['total'] += stat.count
+            entry['difficulties'][stat.difficulty] = stat.count
+
+        return jsonify({
+            'success': True,
+            'total_questions': total,
+            'categories': by_category,
+            'difficulties': by_difficulty
+        })
+
+    @app.cli.command('rebuild-stats')
+    def rebuild_stats_command():
+        """Recount the question_stats summary table from the questions."""
+        QuestionStat.rebuild()
+        click.echo('Question stats rebuilt.')
+
     '''
     DONE @TODO: 
     Create a POST endpoint to get questions based on a search term. 
@@ -179,14 +359,14 @@ def create_app(test_config=None):
     def question_search():
         # use try and except pattern. Try None instead of blank
         search_term = request.json.get('searchTerm', '')
-        selection = Question.query.filter(Question.question.ilike(
-            '%{}%'.format(search_term))).order_by(Question.question).all()
+        # trigram indexed and ranked by relevance, see search.py
+        selection = search_questions(search_term)
         paginated_results = paginate(request, selection)
 
         return jsonify({
             'success': True,
             'questions': paginated_results,
-            'total_matches': len(selection)
+            'total_matches': count(selection)
 
         })
 
@@ -204,7 +384,7 @@ def create_app(test_config=None):
         # my tod: use try and except pattern
         categ_id = categ_id + 1
         selection = Question.query.filter(
-            Question.category == str(categ_id)).order_by(Question.id).all()
+            Question.category == categ_id).order_by(Question.id)
         paginated_questions = paginate(request, selection)
 
         if len(paginated_questions) == 0:
@@ -213,8 +393,8 @@ def create_app(test_config=None):
         return jsonify({
             'success': True,
             'questions': paginated_questions,
-            'total_questions': len(selection),
-            'current_category': Category.query.get(categ_id).format()
+            'total_questions': count(selection),
+            'current_category': categories.get()['by_id'][categ_id]
         })
 
     '''
@@ -235,18 +415,12 @@ def create_app(test_config=None):
         previous_questions = body.get('previous_questions', [])
         quiz_category = body.get('quiz_category', None)
         try:
-            if quiz_category['id'] == 0:
-                selection = Question.query.filter(
-                    Question.id.notin_(previous_questions)).all()
-            else:
-                selection = Question.query.filter(Question.category == quiz_category['id'],
-                                                  Question.id.notin_(previous_questions)).all()
-            questions = [q.format() for q in selection]
-            if len(questions) != 0:
-                random_question = random.choice(questions)
+            # samples a single row in the database, see quiz.py
+            question = draw_question(quiz_category['id'], previous_questions)
+            if question is not None:
                 return jsonify({
                     'success': True,
-                    'question': random_question
+                    'question': question.format()
                 })
             else:
                 return jsonify({
@@ -256,6 +430,55 @@ def create_app(test_config=None):
         except:
             abort(422)
 
+    '''
+    Session mode for the quiz: the deck of the category is shuffled once
+    when the session is created and every draw pops the next question,
+    so previous_questions no longer has to be sent. /quizzes keeps working
+    as before.
+    '''
+    @app.route('/quizzes/sessions', methods=['POST'])
+    def create_quiz_session():
+        body = request.get_json() or {}
+        quiz_category = body.get('quiz_category', None)
+        try:
+            session_id, total = quiz_sessions.create(quiz_category['id'])
+        except:
+            abort(422)
+
+        return jsonify({
+            'success': True,
+            'session_id': session_id,
+            'total_questions': total
+        })
+
+    @app.route('/quizzes/sessions/<session_id>', methods=['POST'])
+    def draw_quiz_question(session_id):
+        try:
+            question = quiz_sessions.draw(session_id)
+        except KeyError:
+            abort(404)
+
+        if question is None:
+            return jsonify({
+                'question': False
+            })
+
+        return jsonify({
+            'success': True,
+            'question': question.format(),
+            'remaining_questions': quiz_sessions.remaining(session_id)
+        })
+
+    @app.route('/quizzes/sessions/<session_id>', methods=['DELETE'])
+    def end_quiz_session(session_id):
+        if not quiz_sessions.discard(session_id):
+            abort(404)
+
+        return jsonify({
+            'success': True,
+            'deleted': session_id
+        })
+
     '''
     DONE @TODO: 
     Create error handlers for all expected errors 
@@ -0,0 +1,90 @@
+import time
+import threading
+from flask import current_app, has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+
+'''
+CachedValue
+    keeps the result of loader() for ttl seconds
+    invalidate() drops it so the next get() loads it again
+    adjust(delta) adds delta to a cached number
+'''
+
+
+class CachedValue(object):
+
+    def __init__(self, loader, ttl=60):
+        self.loader = loader
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.value = None
+        self.expires = 0
+
+    def get(self):
+        with self.lock:
+            if time.monotonic() >= self.expires:
+                self.value = self.loader()
+                self.expires = time.monotonic() + self.ttl
+            return self.value
+
+    def adjust(self, delta):
+        # keeps a cached count current after a write instead of reloading it,
+        # nothing to do when it is not loaded
+        with self.lock:
+            if self.value is not None and time.monotonic() < self.expires:
+                self.value += delta
+
+    def invalidate(self):
+        with self.lock:
+            self.value = None
+            self.expires = 0
+
+
+'''
+invalidate_on_commit(app, model, cached)
+    drops cached after every commit that inserted, updated or deleted a row
+    of model through the ORM, in the app that registered it
+
+    Rows are only noted at flush time and the caches dropped once the
+    transaction commits, so a get() running in between can not keep rows
+    that are later rolled back. The SQLAlchemy listeners are registered once
+    per model, the caches live in app.extensions and go away with their app.
+    Raw SQL writes bypass it and wait for the ttl.
+'''
+
+_tracked_models = set()
+
+
+def _note_change(mapper, connection, target):
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault('changed_models', set()).add(mapper.class_)
+
+
+def _after_commit(session):
+    changed = session.info.pop('changed_models', None)
+    if not changed or not has_app_context():
+        return
+    caches = current_app.extensions.get('invalidate_on_commit', {})
+    for model in changed:
+        for cached in caches.get(model, ()):
+            cached.invalidate()
+
+
+def _after_rollback(session):
+    session.info.pop('changed_models', None)
+
+
+event.listen(Session, 'after_commit', _after_commit)
+event.listen(Session, 'after_rollback', _after_rollback)
+
+
+def invalidate_on_commit(app, model, cached):
+    if model not in _tracked_models:
+        for name in ('after_insert', 'after_update', 'after_delete'):
+            event.listen(model, name, _note_change)
+        _tracked_models.add(model)
+    caches = app.extensions.setdefault('invalidate_on_commit', {})
+    caches.setdefault(model, []).append(cached)
@@ -0,0 +1,32 @@
+import random
+from sqlalchemy import func
+
+from models import Question
+
+
+'''
+draw_question(category_id, previous_questions)
+    returns one random question of the category (0 or None for all
+    categories) that is not in previous_questions, or None when every
+    question has been played
+
+    The playable questions are counted and one of them is read with
+    OFFSET random(count) over the (category, id) index, so every playable
+    question is equally likely and only one row is loaded. Quiz sessions
+    (see sessions.py) keep a shuffled per-session order instead and do not
+    need previous_questions at all.
+'''
+
+
+def draw_question(category_id, previous_questions):
+    playable = Question.query
+    if category_id:
+        playable = playable.filter(Question.category == category_id)
+    if previous_questions:
+        playable = playable.filter(Question.id.notin_(previous_questions))
+
+    count = playable.with_entities(func.count(Question.id)).scalar()
+    if not count:
+        return None
+    return playable.order_by(Question.id) \
+        .offset(random.randrange(count)).limit(1).first()
@@ -0,0 +1,31 @@
+from sqlalchemy import func
+
+from models import db, Question
+
+
+'''
+search_questions(search_term)
+    query of every question containing search_term (case insensitive),
+    best matches first, ready for paginate() and count()
+
+    In Postgres the ILIKE is answered by the trigram index on
+    questions.question (ix_questions_question_trgm) instead of a sequential
+    scan, and matches are ranked by word_similarity() so that questions
+    where the term is a whole word come before ones where it is buried in
+    a longer word. Other databases fall back to alphabetical order.
+'''
+
+
+def escape_like(term):
+    # % and _ typed by the user are matched literally
+    return term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def search_questions(search_term):
+    query = Question.query.filter(Question.question.ilike(
+        '%{}%'.format(escape_like(search_term)), escape='\\'))
+
+    if db.engine.dialect.name == 'postgresql':
+        rank = func.word_similarity(search_term, Question.question)
+        return query.order_by(rank.desc(), Question.id)
+    return query.order_by(Question.question, Question.id)
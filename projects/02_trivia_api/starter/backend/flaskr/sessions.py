@@ -0,0 +1,68 @@
+import random
+import secrets
+import threading
+from array import array
+from collections import OrderedDict
+
+from models import Question
+
+
+'''
+QuizSessions
+    server side quiz decks, kept in process for the most recently used
+    `capacity` sessions
+
+    create(category_id) shuffles the ids of every question of the category
+    (0 or None for all categories) once and stores them as an array of ints,
+    draw(session_id) pops the next id off the end of the deck, so the client
+    no longer has to send previous_questions and every draw costs the same
+    regardless of how long the quiz has been running.
+'''
+
+
+class QuizSessions(object):
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.lock = threading.Lock()
+        self.decks = OrderedDict()
+
+    def create(self, category_id):
+        query = Question.query.with_entities(Question.id)
+        if category_id:
+            query = query.filter(Question.category == category_id)
+        deck = array('i', (row[0] for row in query))
+        random.shuffle(deck)
+
+        session_id = secrets.token_urlsafe(16)
+        with self.lock:
+            self.decks[session_id] = deck
+            if len(self.decks) > self.capacity:
+                self.decks.popitem(last=False)
+        return session_id, len(deck)
+
+    def pop(self, session_id):
+        # next question id, None once the deck is empty, KeyError for an
+        # unknown or evicted session
+        with self.lock:
+            deck = self.decks[session_id]
+            self.decks.move_to_end(session_id)
+            return deck.pop() if deck else None
+
+    def draw(self, session_id):
+        # skips questions deleted since the deck was shuffled
+        while True:
+            question_id = self.pop(session_id)
+            if question_id is None:
+                return None
+            question = Question.query.get(question_id)
+            if question is not None:
+                return question
+
+    def remaining(self, session_id):
+        with self.lock:
+            return len(self.decks[session_id])
+
+    def discard(self, session_id):
+        with self.lock:
+            return self.decks.pop(session_id, None) is not None
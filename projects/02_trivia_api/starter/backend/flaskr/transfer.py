@@ -0,0 +1,147 @@
+import csv
+import io
+import json
+from collections import Counter
+
+from models import db, Question, Category, QuestionStat
+
+
+'''
+Bulk import and export of questions.
+
+import_questions() streams CSV (question,answer,category,difficulty header)
+or JSON lines, validates every record against the category ids loaded once
+up front and inserts the valid ones batch_size at a time, one multi-row
+INSERT and one commit per batch. Rejected records are reported by line
+number and do not stop the import.
+
+export_questions() walks the table in id order, one batch at a time, so the
+table is never loaded into memory as a whole.
+'''
+
+FORMATS = ('csv', 'jsonl')
+FIELDS = ('id', 'question', 'answer', 'category', 'difficulty')
+REQUIRED = ('question', 'answer', 'category', 'difficulty')
+DIFFICULTIES = range(1, 6)
+MAX_REPORTED_REJECTS = 1000
+
+
+def _json_lines(stream):
+    for line_num, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_num, record if isinstance(record, dict) else None
+
+
+def records(stream, format):
+    # (line number, record) pairs, record is None for a line that is not a
+    # JSON object. A CSV header has to name every required column, a
+    # ValueError is raised up front otherwise.
+    if format == 'jsonl':
+        return _json_lines(stream)
+    if format != 'csv':
+        raise ValueError('Unknown format: ' + format)
+
+    reader = csv.DictReader(stream)
+    missing = set(REQUIRED) - set(reader.fieldnames or ())
+    if missing:
+        raise ValueError('CSV header is missing ' + ', '.join(sorted(missing)))
+    return ((reader.line_num, record) for record in reader)
+
+
+def question_values(record, category_ids):
+    # the columns of one question, or a ValueError saying why the record
+    # is rejected
+    if record is None:
+        raise ValueError('malformed row')
+    question = (record.get('question') or '').strip()
+    answer = (record.get('answer') or '').strip()
+    if not question or not answer:
+        raise ValueError('question and answer are required')
+    try:
+        category = int(record.get('category'))
+        difficulty = int(record.get('difficulty'))
+    except (TypeError, ValueError):
+        raise ValueError('category and difficulty must be integers')
+    if category not in category_ids:
+        raise ValueError('unknown category {}'.format(category))
+    if difficulty not in DIFFICULTIES:
+        raise ValueError('difficulty must be between {} and {}'.format(
+            DIFFICULTIES[0], DIFFICULTIES[-1]))
+    return {
+        'question': question,
+        'answer': answer,
+        'category': category,
+        'difficulty': difficulty
+    }
+
+
+def insert_batch(batch):
+    # one INSERT ... VALUES (...), (...) for the whole batch, the stats are
+    # bumped once per category and difficulty and everything is committed
+    # together
+    db.session.execute(Question.__table__.insert().values(batch))
+    groups = Counter((row['category'], row['difficulty']) for row in batch)
+    for (category, difficulty), added in groups.items():
+        QuestionStat.bump(category, difficulty, added)
+    db.session.commit()
+    return len(batch)
+
+
+def import_questions(stream, format, batch_size=1000):
+    # returns the inserted and rejected counts and the first
+    # MAX_REPORTED_REJECTS rejected lines with their reason
+    category_ids = set(
+        row[0] for row in Category.query.with_entities(Category.id))
+    summary = {'inserted': 0, 'rejected': 0, 'rejects': []}
+
+    batch = []
+    for line_num, record in records(stream, format):
+        try:
+            batch.append(question_values(record, category_ids))
+        except ValueError as error:
+            summary['rejected'] += 1
+            if len(summary['rejects']) < MAX_REPORTED_REJECTS:
+                summary['rejects'].append(
+                    {'line': line_num, 'reason': str(error)})
+            continue
+        if len(batch) == batch_size:
+            summary['inserted'] += insert_batch(batch)
+            batch = []
+    if batch:
+        summary['inserted'] += insert_batch(batch)
+    return summary
+
+
+def export_questions(format, batch_size=1000):
+    # yields the export as text chunks, one per batch
+    if format not in FORMATS:
+        raise ValueError('Unknown format: ' + format)
+
+    if format == 'csv':
+        yield ','.join(FIELDS) + '\r\n'
+
+    last_id = 0
+    while True:
+        batch = Question.query.filter(Question.id > last_id) \
+            .order_by(Question.id).limit(batch_size).all()
+        if not batch:
+            return
+        last_id = batch[-1].id
+
+        buffer = io.StringIO()
+        if format == 'csv':
+            writer = csv.writer(buffer)
+            for question in batch:
+                formatted = question.format()
+                writer.writerow([formatted[field] for field in FIELDS])
+        else:
+            for question in batch:
+                buffer.write(json.dumps(question.format()) + '\n')
+        # the rows of this batch are not needed any more
+        db.session.expunge_all()
+        yield buffer.getvalue()
@@ -0,0 +1,71 @@
+"""questions.category as an integer foreign key, composite (category, id) index
+
+Revision ID: 5c0e7a91b2d4
+Revises: 
+Create Date: 2026-10-18 15:42:10.318207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c0e7a91b2d4'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # databases built by db.create_all() store the category as a string,
+    # trivia.psql already uses an integer, both end up the same below.
+    category_type = op.get_bind().execute(sa.text("""
+        SELECT data_type FROM information_schema.columns
+        WHERE table_schema = current_schema()
+          AND table_name = 'questions' AND column_name = 'category'
+    """)).scalar()
+
+    if category_type in ('character varying', 'character', 'text'):
+        # categories stored by name are mapped to their id first, anything
+        # else that is not a number is cleared
+        op.execute("""
+            UPDATE questions SET category = categories.id::text
+            FROM categories
+            WHERE questions.category = categories.type
+        """)
+        op.execute("""
+            UPDATE questions SET category = NULL
+            WHERE category !~ '^[0-9]+$'
+        """)
+        op.execute("""
+            ALTER TABLE questions ALTER COLUMN category TYPE integer
+            USING category::integer
+        """)
+
+    op.execute("""
+        UPDATE questions SET category = NULL
+        WHERE category NOT IN (SELECT id FROM categories)
+    """)
+
+    op.execute('ALTER TABLE questions DROP CONSTRAINT IF EXISTS category')
+    op.execute('ALTER TABLE questions DROP CONSTRAINT IF EXISTS questions_category_fkey')
+    op.create_foreign_key('questions_category_fkey', 'questions', 'categories',
+                          ['category'], ['id'],
+                          onupdate='CASCADE', ondelete='SET NULL')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_questions_category_id '
+               'ON questions (category, id)')
+
+    # the app does not create pg_trgm at runtime, its role may not be
+    # allowed to, so it is set up here together with the search index
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    op.execute('CREATE INDEX IF NOT EXISTS ix_questions_question_trgm '
+               'ON questions USING gin (question gin_trgm_ops)')
+
+
+def downgrade():
+    op.drop_index('ix_questions_category_id', table_name='questions')
+    op.drop_constraint('questions_category_fkey', 'questions', type_='foreignkey')
+    op.alter_column('questions', 'category',
+                    existing_type=sa.Integer(),
+                    type_=sa.String(),
+                    postgresql_using='category::text')
@@ -1,6 +1,9 @@
 import os
-from sqlalchemy import Column, String, Integer, create_engine
+from sqlalchemy import (Column, String, Integer, ForeignKey, Index, text,
+                        create_engine, inspect)
+from sqlalchemy.orm import column_property
 from flask_sqlalchemy import SQLAlchemy
+from flask_migrate import Migrate
 import json
 
 database_name = "trivia"
@@ -20,6 +23,7 @@ def setup_db(app, database_path=database_path):
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
     db.app = app
     db.init_app(app)
+    migrate = Migrate(app, db)
     db.create_all()
 
 
@@ -35,8 +39,22 @@ class Question(db.Model):
     id = Column(Integer, primary_key=True)
     question = Column(String)
     answer = Column(String)
-    category = Column(String)
-    difficulty = Column(Integer)
+    # active_history loads the old value before it is replaced, even when
+    # the previous commit expired it, so update() can move the stats
+    category = column_property(Column(Integer, ForeignKey(
+        'categories.id', onupdate='CASCADE', ondelete='SET NULL')),
+        active_history=True)
+    difficulty = column_property(Column(Integer), active_history=True)
+
+    __table_args__ = (
+        # per category listings and quiz draws filter on category and
+        # walk the ids in order
+        Index('ix_questions_category_id', 'category', 'id'),
+        # serves ILIKE '%term%' in Postgres, see flaskr/search.py
+        Index('ix_questions_question_trgm', 'question',
+              postgresql_using='gin',
+              postgresql_ops={'question': 'gin_trgm_ops'}),
+    )
 
     def __init__(self, question, answer, category, difficulty):
         self.question = question
@@ -46,12 +64,30 @@ class Question(db.Model):
 
     def insert(self):
         db.session.add(self)
+        QuestionStat.bump(self.category, self.difficulty, 1)
         db.session.commit()
 
     def update(self):
+        # moves the question between stats when category or difficulty
+        # changed since it was loaded
+        state = inspect(self)
+        category = state.attrs.category.history
+        difficulty = state.attrs.difficulty.history
+        if category.has_changes() or difficulty.has_changes():
+            QuestionStat.bump(self._previous('category', category),
+                              self._previous('difficulty', difficulty), -1)
+            QuestionStat.bump(self.category, self.difficulty, 1)
         db.session.commit()
 
+    def _previous(self, name, history):
+        # the value before this update, an attribute that was not set is
+        # unchanged (and may still be expired, so it is read again)
+        if history.deleted:
+            return history.deleted[0]
+        return getattr(self, name)
+
     def delete(self):
+        QuestionStat.bump(self.category, self.difficulty, -1)
         db.session.delete(self)
         db.session.commit()
 
@@ -80,8 +116,92 @@ class Category(db.Model):
     def __init__(self, type):
         self.type = type
 
+    def insert(self):
+        db.session.add(self)
+        db.session.commit()
+
+    def delete(self):
+        # the foreign key sets the category of its questions to NULL, so
+        # their stats move to category 0 in the same transaction
+        QuestionStat.uncategorize(self.id)
+        db.session.delete(self)
+        db.session.commit()
+
     def format(self):
         return {
             'id': self.id,
             'type': self.type
         }
+
+
+'''
+QuestionStat
+    number of questions per category and difficulty, kept current by
+    Question.insert() and delete() in the same transaction so /stats never
+    has to count the questions table. Question.update() moves a question
+    between rows and Category.delete() moves the rows of the category to
+    category 0, where questions without a category are counted.
+    Writes that bypass the models (raw SQL, psql, ON UPDATE CASCADE of a
+    category id) need `flask rebuild-stats` afterwards.
+'''
+
+BUMP_STAT_SQL = text('''
+    INSERT INTO question_stats (category, difficulty, count)
+    VALUES (:category, :difficulty, :delta)
+    ON CONFLICT (category, difficulty)
+    DO UPDATE SET count = question_stats.count + excluded.count
+''')
+
+UNCATEGORIZE_STATS_SQL = text('''
+    INSERT INTO question_stats (category, difficulty, count)
+    SELECT 0, difficulty, count FROM question_stats WHERE category = :category
+    ON CONFLICT (category, difficulty)
+    DO UPDATE SET count = question_stats.count + excluded.count
+''')
+
+REBUILD_STATS_SQL = text('''
+    INSERT INTO question_stats (category, difficulty, count)
+    SELECT coalesce(category, 0), coalesce(difficulty, 0), count(*)
+    FROM questions
+    GROUP BY coalesce(category, 0), coalesce(difficulty, 0)
+''')
+
+
+class QuestionStat(db.Model):
+    __tablename__ = 'question_stats'
+
+    category = Column(Integer, primary_key=True, autoincrement=False)
+    difficulty = Column(Integer, primary_key=True, autoincrement=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    @staticmethod
+    def bump(category, difficulty, delta):
+        # upsert, commits with the caller's transaction
+        db.session.execute(BUMP_STAT_SQL, {
+            'category': int(category or 0),
+            'difficulty': int(difficulty or 0),
+            'delta': delta
+        })
+
+    @staticmethod
+    def uncategorize(category):
+        # folds the rows of a category into category 0
+        if not category:
+            return
+        db.session.execute(UNCATEGORIZE_STATS_SQL, {'category': category})
+        db.session.execute(QuestionStat.__table__.delete().where(
+            QuestionStat.category == category))
+
+    @staticmethod
+    def rebuild():
+        # recounts everything from the questions table
+        db.session.execute(QuestionStat.__table__.delete())
+        db.session.execute(REBUILD_STATS_SQL)
+        db.session.commit()
+
+    def format(self):
+        return {
+            'category': self.category,
+            'difficulty': self.difficulty,
+            'count': self.count
+        }
@@ -33,6 +33,18 @@ class TriviaTestCase(unittest.TestCase):
             # create all tables
             self.db.create_all()
 
+    def test_get_categories_not_modified(self):
+        res = self.client().get('/categories')
+        etag = res.headers.get('ETag')
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(etag)
+
+        res = self.client().get('/categories',
+                                headers={'If-None-Match': etag})
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.data, b'')
+
     def test_get_questions(self):
         res = self.client().get('/questions')
         data = json.loads(res.data)
@@ -48,6 +60,17 @@ class TriviaTestCase(unittest.TestCase):
 
         self.assertEqual(res.status_code, 404)
 
+    def test_get_questions_second_page(self):
+        first = json.loads(self.client().get('/questions').data)
+        res = self.client().get('/questions?page=2')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['total_questions'], first['total_questions'])
+        self.assertTrue(len(data['questions']) <= 10)
+        first_ids = set(q['id'] for q in first['questions'])
+        self.assertFalse(first_ids & set(q['id'] for q in data['questions']))
+
     def test_delete_questions(self):
         res = self.client().delete('/questions/5')
         data = json.loads(res.data)
@@ -55,6 +78,7 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data['success'], True)
         self.assertTrue(data['deleted'])
         self.assertTrue(data['total_questions'])
+        self.assertNotIn('questions', data)
 
     def test_delete_questions_422(self):
         """Test case for trying to delete non existing questions"""
@@ -71,6 +95,78 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data['success'], True)
         self.assertTrue(data['created'])
 
+    def test_import_questions(self):
+        body = '\n'.join([
+            json.dumps(self.new_question),
+            json.dumps({'question': 'Missing answer', 'category': 3}),
+            'not json',
+            json.dumps(dict(self.new_question, difficulty=9))
+        ])
+        res = self.client().post('/questions/import', data=body,
+                                 content_type='application/x-ndjson')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['inserted'], 1)
+        self.assertEqual(data['rejected'], 3)
+        self.assertEqual([r['line'] for r in data['rejects']], [2, 3, 4])
+
+    def test_export_questions_csv(self):
+        res = self.client().get('/questions/export?format=csv')
+        lines = res.data.decode('utf-8').splitlines()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(lines[0], 'id,question,answer,category,difficulty')
+        self.assertTrue(len(lines) > 1)
+
+    def test_create_questions_include_page(self):
+        total = json.loads(self.client().get('/questions').data)[
+            'total_questions']
+        res = self.client().post('/questions?include=page',
+                                 json=self.new_question)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['total_questions'], total + 1)
+        self.assertTrue(len(data['questions']) <= 10)
+
+    def test_stats_follow_writes(self):
+        before = json.loads(self.client().get('/stats').data)
+        res = self.client().post('/questions', json=self.new_question)
+        after = json.loads(self.client().get('/stats').data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(after['success'], True)
+        self.assertEqual(after['total_questions'],
+                         before['total_questions'] + 1)
+        self.assertEqual(after['categories']['3']['total'],
+                         before['categories']['3']['total'] + 1)
+
+    def test_stats_follow_repeated_updates(self):
+        # the first update() commits and expires the question, the second
+        # one still has to take it off its old category and difficulty
+        with self.app.app_context():
+            question = Question(**self.new_question)
+            question.insert()
+            before = json.loads(self.client().get('/stats').data)
+
+            question.category = 4
+            question.update()
+            question.difficulty = 5
+            question.update()
+            after = json.loads(self.client().get('/stats').data)
+            question.delete()
+
+        self.assertEqual(after['total_questions'], before['total_questions'])
+        self.assertEqual(after['categories']['3']['total'],
+                         before['categories']['3']['total'] - 1)
+        self.assertEqual(after['categories']['4']['total'],
+                         before['categories']['4']['total'] + 1)
+        self.assertEqual(after['difficulties']['2'],
+                         before['difficulties']['2'] - 1)
+        self.assertEqual(after['difficulties']['5'],
+                         before['difficulties'].get('5', 0) + 1)
+
     def test_question_search(self):
         res = self.client().post('/questions/search',
                                  json={'searchTerm': 'title'})
@@ -121,6 +217,19 @@ class TriviaTestCase(unittest.TestCase):
         self.assertEqual(data['success'], True)
         self.assertTrue(data['question'])
 
+    def test_play_quiz_skips_previous_questions(self):
+        previous = []
+        for _ in range(3):
+            res = self.client().post('/quizzes',
+                                     json={'quiz_category': {'id': 0},
+                                           'previous_questions': previous
+                                           })
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 200)
+            self.assertNotIn(data['question']['id'], previous)
+            previous.append(data['question']['id'])
+
     def test_play_quiz_422(self):
         res = self.client().post('/quizzes',
                                  json={'previous_question': []
@@ -129,6 +238,35 @@ class TriviaTestCase(unittest.TestCase):
 
         self.assertEqual(res.status_code, 422)
 
+    def test_quiz_session(self):
+        res = self.client().post('/quizzes/sessions',
+                                 json={'quiz_category': {'id': 4}})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(data['session_id'])
+        self.assertTrue(data['total_questions'])
+
+        url = '/quizzes/sessions/{}'.format(data['session_id'])
+        seen = []
+        for _ in range(data['total_questions']):
+            question = json.loads(self.client().post(url).data)['question']
+            if not question:
+                break
+            self.assertNotIn(question['id'], seen)
+            seen.append(question['id'])
+
+        data = json.loads(self.client().post(url).data)
+        self.assertEqual(data['question'], False)
+        self.assertEqual(self.client().delete(url).status_code, 200)
+
+    def test_quiz_session_404(self):
+        res = self.client().post('/quizzes/sessions/not-a-session')
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(data['success'], False)
+
     def tearDown(self):
         """Executed after reach test"""
         pass
@@ -0,0 +1,157 @@
+import os
+import json
+import time
+import unittest
+
+from flaskr import EXPORT_BATCH_SIZE
+from models import db, Question
+from benchmarks.common import bench_app, seed, QueryCounter, percentile
+
+
+'''
+Performance budgets for every route of create_app().
+
+Seeds PERF_QUESTIONS generated questions (10000 by default) into a throwaway
+SQLite database, or the database in BENCH_DATABASE_PATH, which is emptied,
+then calls each route PERF_REPEAT times and fails when a single request
+issues more SQL statements, or the p95 latency is higher, than allowed in
+perf_budgets.json. Query budgets do not depend on the table size, so a route
+that goes from O(page) to O(table) fails here first.
+
+    python test_perf.py
+'''
+
+BUDGETS_PATH = os.path.join(os.path.dirname(__file__), 'perf_budgets.json')
+QUESTIONS = int(os.environ.get('PERF_QUESTIONS', 10000))
+REPEAT = int(os.environ.get('PERF_REPEAT', 20))
+
+
+class TriviaPerformanceTestCase(unittest.TestCase):
+    """Query count and latency budgets of the trivia routes"""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(BUDGETS_PATH) as budgets:
+            cls.budgets = json.load(budgets)
+        cls.app = bench_app()
+        cls.client = cls.app.test_client()
+        with cls.app.app_context():
+            seed(QUESTIONS)
+            cls.ids = [row[0] for row in
+                       Question.query.with_entities(Question.id)
+                       .order_by(Question.id)]
+
+    def measure(self, route, call):
+        # warms caches with one request, then records REPEAT requests
+        budget = self.budgets[route]
+        self.assertEqual(call(0).status_code // 100, 2)
+
+        timings = []
+        queries = 0
+        with self.app.app_context():
+            engine = db.engine
+        for i in range(1, REPEAT + 1):
+            with QueryCounter(engine) as counter:
+                start = time.perf_counter()
+                res = call(i)
+                timings.append((time.perf_counter() - start) * 1000)
+            self.assertEqual(res.status_code // 100, 2, route)
+            queries = max(queries, counter.count)
+
+        p95 = percentile(timings, 95)
+        self.assertLessEqual(
+            queries, budget['queries'],
+            '{} issued {} queries, budget is {}'.format(
+                route, queries, budget['queries']))
+        self.assertLessEqual(
+            p95, budget['p95_ms'],
+            '{} p95 is {:.1f}ms, budget is {}ms'.format(
+                route, p95, budget['p95_ms']))
+
+    def test_get_categories(self):
+        self.measure('GET /categories',
+                     lambda i: self.client.get('/categories'))
+
+    def test_get_questions(self):
+        self.measure('GET /questions',
+                     lambda i: self.client.get('/questions?page=1'))
+
+    def test_get_questions_last_page(self):
+        page = QUESTIONS // 10
+        self.measure('GET /questions?page=last', lambda i: self.client.get(
+            '/questions?page={}'.format(page)))
+
+    def test_qs_by_categories(self):
+        self.measure('GET /categories/<id>/questions',
+                     lambda i: self.client.get('/categories/2/questions'))
+
+    def test_question_search(self):
+        self.measure('POST /questions/search', lambda i: self.client.post(
+            '/questions/search', json={'searchTerm': 'river'}))
+
+    def test_create_question(self):
+        self.measure('POST /questions', lambda i: self.client.post(
+            '/questions', json={'question': 'Perf question {}'.format(i),
+                                'answer': 'Answer', 'category': 1,
+                                'difficulty': 1}))
+
+    def test_delete_question(self):
+        # deletes from the end of the table, other tests read the start
+        self.measure('DELETE /questions/<id>', lambda i: self.client.delete(
+            '/questions/{}'.format(self.ids[-1 - i])))
+
+    def test_import_questions(self):
+        body = '\n'.join(json.dumps({
+            'question': 'Imported {}'.format(n), 'answer': 'Answer',
+            'category': 2, 'difficulty': 3}) for n in range(100))
+        self.measure('POST /questions/import', lambda i: self.client.post(
+            '/questions/import', data=body,
+            content_type='application/x-ndjson'))
+
+    def test_export_questions(self):
+        # the export reads the whole table by design, one query per batch
+        route = 'GET /questions/export'
+        with self.app.app_context():
+            engine = db.engine
+            total = Question.query.count()
+        with QueryCounter(engine) as counter:
+            res = self.client.get('/questions/export')
+            lines = res.data.count(b'\n')
+
+        self.assertEqual(lines, total)
+        self.assertLessEqual(
+            counter.count,
+            total // EXPORT_BATCH_SIZE + self.budgets[route]['queries'])
+
+    def test_stats(self):
+        self.measure('GET /stats', lambda i: self.client.get('/stats'))
+
+    def test_play_quiz(self):
+        previous = self.ids[:200]
+        self.measure('POST /quizzes', lambda i: self.client.post(
+            '/quizzes', json={'quiz_category': {'id': 4},
+                              'previous_questions': previous}))
+
+    def test_quiz_session(self):
+        self.measure('POST /quizzes/sessions', lambda i: self.client.post(
+            '/quizzes/sessions', json={'quiz_category': {'id': 0}}))
+
+        session_id = json.loads(self.client.post(
+            '/quizzes/sessions', json={'quiz_category': {'id': 0}}).data)[
+            'session_id']
+        url = '/quizzes/sessions/{}'.format(session_id)
+        self.measure('POST /quizzes/sessions/<id>',
+                     lambda i: self.client.post(url))
+
+    def test_end_quiz_session(self):
+        # one session per request, measure() makes REPEAT + 1 of them
+        urls = ['/quizzes/sessions/{}'.format(json.loads(self.client.post(
+            '/quizzes/sessions', json={'quiz_category': {'id': 0}}).data)[
+            'session_id']) for i in range(REPEAT + 1)]
+        self.measure('DELETE /quizzes/sessions/<id>',
+                     lambda i: self.client.delete(urls[i]))
+
+
+# Make the tests conveniently executable
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import random
+import sys
+
+from benchmarks.common import SigningKey, measure, report
+
+
+'''
+Verification cost of requires_auth() with and without the verified-token
+cache. A few hundred users each reuse their bearer token, the most active
+ones far more often than the rest, as a browser session would.
+
+    python -m benchmarks.bench_auth [requests] [users]
+'''
+
+PERMISSIONS = ['get:drinks-detail', 'post:drinks', 'patch:drinks',
+               'delete:drinks']
+
+
+def main(requests=20000, users=200):
+    key = SigningKey()
+    os.environ['JWKS_URL'] = key.write_jwks()
+    # imported here so the store picks up the local JWKS_URL
+    from src.auth import auth
+    from fsnd_auth import TokenCache
+
+    tokens = [key.token(PERMISSIONS, subject='user-{}'.format(n))
+              for n in range(users)]
+    rng = random.Random(42)
+    weights = [1.0 / rank for rank in range(1, users + 1)]
+    calls = rng.choices(tokens, weights=weights, k=requests)
+
+    authenticator = auth.authenticator
+    cached = authenticator.tokens
+    authenticator.tokens = TokenCache(capacity=0)
+    report('without token cache', measure(auth.verify_decode_jwt, calls))
+
+    authenticator.tokens = cached
+    authenticator.tokens.clear()
+    report('with token cache', measure(auth.verify_decode_jwt, calls))
+    stats = authenticator.tokens.stats()
+    print('hits={hits} misses={misses} cached tokens={size}'.format(**stats))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
@@ -0,0 +1,75 @@
+import contextlib
+import json
+import os
+import random
+import sys
+import tempfile
+
+from benchmarks.common import measure, report
+
+
+'''
+GET /drinks with a table full of drinks, before and after the parsed
+recipe cache. "before" swaps in the previous Drink.short(), which parsed
+the recipe twice and printed it (sent to /dev/null here).
+
+    python -m benchmarks.bench_drinks [drinks] [repeat]
+'''
+
+COLORS = ['brown', 'white', 'black', 'tan', 'cream', 'caramel', 'grey']
+NAMES = ['espresso', 'milk', 'foam', 'water', 'chocolate', 'syrup', 'ice']
+
+
+def legacy_short(self):
+    print(json.loads(self.recipe))
+    short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(self.recipe)]
+    return {
+        'id': self.id,
+        'title': self.title,
+        'recipe': short_recipe
+    }
+
+
+def seed(db, Drink, count, seed=42):
+    rng = random.Random(seed)
+    db.session.bulk_insert_mappings(Drink, [{
+        'title': 'drink {}'.format(number),
+        'recipe': json.dumps([{
+            'name': rng.choice(NAMES),
+            'color': rng.choice(COLORS),
+            'parts': rng.randint(1, 4)
+        } for _ in range(rng.randint(1, 3))])
+    } for number in range(count)])
+    db.session.commit()
+
+
+def main(drinks=10000, repeat=10):
+    handle, path = tempfile.mkstemp(suffix='.db', prefix='coffee_bench_')
+    os.close(handle)
+    # setup_db() reads database_path when src.api creates the app, so the
+    # throwaway database is swapped in before that import
+    from src.database import models
+    models.database_path = 'sqlite:///' + path
+    from src.api import app
+    from src.database.models import db, db_drop_and_create_all, Drink
+
+    db_drop_and_create_all()
+    seed(db, Drink, drinks)
+    client = app.test_client()
+
+    def get_drinks(_):
+        assert client.get('/drinks').status_code == 200
+
+    short = Drink.short
+    Drink.short = legacy_short
+    with open(os.devnull, 'w') as devnull, \
+            contextlib.redirect_stdout(devnull):
+        before = measure(get_drinks, range(repeat))
+    report('before GET /drinks', before)
+    Drink.short = short
+    report('after GET /drinks', measure(get_drinks, range(repeat)))
+    os.remove(path)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
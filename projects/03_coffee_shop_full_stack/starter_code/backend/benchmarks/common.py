@@ -0,0 +1,91 @@
+import base64
+import json
+import os
+import tempfile
+import time
+
+from Crypto.PublicKey import RSA
+from jose import jwt
+
+
+'''
+Shared helpers for the coffee shop benchmarks.
+
+Run them from the backend folder, e.g.
+    python -m benchmarks.bench_auth
+
+Tokens are signed with a throwaway RSA key whose JWKS is written to a
+temporary file, so nothing talks to Auth0.
+'''
+
+AUDIENCE = 'coffee'
+ISSUER = 'https://edutest2.auth0.com/'
+
+
+def _b64(number):
+    raw = number.to_bytes((number.bit_length() + 7) // 8, 'big')
+    return base64.urlsafe_b64encode(raw).rstrip(b'=').decode('ascii')
+
+
+class SigningKey(object):
+
+    def __init__(self, kid='bench-key'):
+        key = RSA.generate(2048)
+        self.kid = kid
+        self.pem = key.exportKey('PEM').decode('ascii')
+        self.jwk = {
+            'kty': 'RSA',
+            'kid': kid,
+            'use': 'sig',
+            'n': _b64(key.n),
+            'e': _b64(key.e)
+        }
+
+    def write_jwks(self):
+        # returns a file:// URL for JWKS_URL
+        handle, path = tempfile.mkstemp(suffix='.json', prefix='jwks_')
+        with os.fdopen(handle, 'w') as jwks:
+            json.dump({'keys': [self.jwk]}, jwks)
+        return 'file://' + path
+
+    def token(self, permissions=(), subject='bench-user', ttl=3600):
+        claims = {
+            'iss': ISSUER,
+            'aud': AUDIENCE,
+            'sub': subject,
+            'exp': int(time.time()) + ttl,
+            'permissions': list(permissions)
+        }
+        return jwt.encode(claims, self.pem, algorithm='RS256',
+                          headers={'kid': self.kid})
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(fn, calls):
+    # latency percentiles in milliseconds over one fn(arg) per arg in calls
+    timings = []
+    for arg in calls:
+        start = time.perf_counter()
+        fn(arg)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'calls': len(timings),
+        'total_ms': round(sum(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+    }
+
+
+def report(name, stats):
+    print('{:<28} calls={:<6} total={:>10.1f}ms p50={:>8.3f}ms p95={:>8.3f}ms p99={:>8.3f}ms'.format(
+        name, stats['calls'], stats['total_ms'], stats['p50_ms'],
+        stats['p95_ms'], stats['p99_ms']))
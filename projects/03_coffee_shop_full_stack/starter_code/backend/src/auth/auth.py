@@ -1,23 +1,44 @@
-import json
-from flask import request, _request_ctx_stack, Flask, abort
-from functools import wraps
-from jose import jwt
-from urllib.request import urlopen
+import os
+
+from fsnd_auth import (AuthError, Authenticator, JWKSKeyStore, JWKSVerifier,
+                       StaticKeyVerifier, SharedSecretVerifier, TokenCache)
 
 
 AUTH0_DOMAIN = 'edutest2.auth0.com'
 ALGORITHMS = ['RS256']
 API_AUDIENCE = 'coffee'
-
-## AuthError Exception
-'''
-AuthError Exception
-A standardized way to communicate auth failure modes
-'''
-class AuthError(Exception):
-    def __init__(self, error, status_code):
-        self.error = error
-        self.status_code = status_code
+ISSUER = 'https://' + AUTH0_DOMAIN + '/'
+# point JWKS_URL at a local file:// or stub server to test offline
+JWKS_URL = os.environ.get(
+    'JWKS_URL', f'https://{AUTH0_DOMAIN}/.well-known/jwks.json')
+# seconds the key set is served before it is refreshed in the background
+JWKS_TTL = int(os.environ.get('JWKS_TTL', 600))
+# verified payloads of recently seen tokens
+TOKEN_CACHE_SIZE = int(os.environ.get('TOKEN_CACHE_SIZE', 1024))
+
+# jwks (default) verifies Auth0 tokens, static reads the keys from
+# AUTH_KEY_FILE (JWKS .json or PEM) and hs256 checks tokens signed with
+# AUTH_SECRET, e.g. for load tests that mint their own tokens
+AUTH_VERIFIER = os.environ.get('AUTH_VERIFIER', 'jwks')
+
+
+def make_verifier(kind):
+    if kind == 'jwks':
+        return JWKSVerifier(JWKSKeyStore(JWKS_URL, ttl=JWKS_TTL),
+                            API_AUDIENCE, ISSUER, algorithms=ALGORITHMS)
+    if kind == 'static':
+        return StaticKeyVerifier(os.environ['AUTH_KEY_FILE'], API_AUDIENCE,
+                                 ISSUER, algorithms=ALGORITHMS)
+    if kind == 'hs256':
+        return SharedSecretVerifier(os.environ['AUTH_SECRET'], API_AUDIENCE,
+                                    ISSUER)
+    raise ValueError('Unknown AUTH_VERIFIER: ' + kind)
+
+
+# one verifier and token cache for the whole app, see the fsnd_auth package
+# at the root of the repository
+authenticator = Authenticator(make_verifier(AUTH_VERIFIER),
+                              tokens=TokenCache(capacity=TOKEN_CACHE_SIZE))
 
 
 ## Auth Header
@@ -31,36 +52,7 @@ class AuthError(Exception):
     return the token part of the header
 '''
 def get_token_auth_header():
-    """Obtains the Access Token from the Authorization Header
-    """
-    auth = request.headers.get('Authorization', None)
-    if not auth:
-        raise AuthError({
-            'code': 'authorization_header_missing',
-            'description': 'Authorization header is expected.'
-        }, 401)
-
-    parts = auth.split()
-    if parts[0].lower() != 'bearer':
-        raise AuthError({
-            'code': 'invalid_header',
-            'description': 'Authorization header must start with "Bearer".'
-        }, 401)
-
-    elif len(parts) == 1:
-        raise AuthError({
-            'code': 'invalid_header',
-            'description': 'Token not found.'
-        }, 401)
-
-    elif len(parts) > 2:
-        raise AuthError({
-            'code': 'invalid_header',
-            'description': 'Authorization header must be bearer token.'
-        }, 401)
-
-    token = parts[1]
-    return token
+    return authenticator.get_token_auth_header()
 
 '''
 @DONE @TODO implement check_permissions(permission, payload) method
@@ -73,21 +65,8 @@ def get_token_auth_header():
     it should raise an AuthError if the requested permission string is not in the payload permissions array
     return true otherwise
 '''
-# def check_permissions(permission, payload):
-#     raise Exception('Not Implemented')
-def check_permissions(permission, payload):
-    if 'permissions' not in payload:
-                        raise AuthError({
-                            'code': 'invalid_claims',
-                            'description': 'Permissions not included in JWT.'
-                        }, 400)
-
-    if permission not in payload['permissions']:
-        raise AuthError({
-            'code': 'unauthorized',
-            'description': 'Permission not found.'
-        }, 403)
-    return True
+def check_permissions(permission, payload, permissions=None):
+    return authenticator.check_permissions(permission, payload, permissions)
 
 
 '''
@@ -104,57 +83,11 @@ def check_permissions(permission, payload):
     !!NOTE urlopen has a common certificate error described here: https://stackoverflow.com/questions/50236117/scraping-ssl-certificate-verify-failed-error-for-http-en-wikipedia-org
 '''
 def verify_decode_jwt(token):
-    jsonurl = urlopen(f'https://{AUTH0_DOMAIN}/.well-known/jwks.json')
-    jwks = json.loads(jsonurl.read())
-    unverified_header = jwt.get_unverified_header(token)
-    rsa_key = {}
-    if 'kid' not in unverified_header:
-        raise AuthError({
-            'code': 'invalid_header',
-            'description': 'Authorization malformed.'
-        }, 401)
-
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
-    if rsa_key:
-        try:
-            payload = jwt.decode(
-                token,
-                rsa_key,
-                algorithms=ALGORITHMS,
-                audience=API_AUDIENCE,
-                issuer='https://' + AUTH0_DOMAIN + '/'
-            )
-
-            return payload
-
-        except jwt.ExpiredSignatureError:
-            raise AuthError({
-                'code': 'token_expired',
-                'description': 'Token expired.'
-            }, 401)
-
-        except jwt.JWTClaimsError:
-            raise AuthError({
-                'code': 'invalid_claims',
-                'description': 'Incorrect claims. Please, check the audience and issuer.'
-            }, 401)
-        except Exception:
-            raise AuthError({
-                'code': 'invalid_header',
-                'description': 'Unable to parse authentication token.'
-            }, 400)
-    raise AuthError({
-                'code': 'invalid_header',
-                'description': 'Unable to find the appropriate key.'
-            }, 400)
+    return authenticator.verify_decode_jwt(token)
+
+
+def verify_token(token):
+    return authenticator.verify_token(token)
 
 '''
 @DONE @TODO implement @requires_auth(permission) decorator method
@@ -166,14 +99,6 @@ def verify_decode_jwt(token):
     it should use the check_permissions method validate claims and check the requested permission
     return the decorator which passes the decoded payload to the decorated method
 '''
-def requires_auth(permission=''):
-    def requires_auth_decorator(f):
-        @wraps(f)
-        def wrapper(*args, **kwargs):
-            token = get_token_auth_header()
-            payload = verify_decode_jwt(token)
-            check_permissions(permission, payload)
-            return f(payload, *args, **kwargs)
-
-        return wrapper
-    return requires_auth_decorator
\ No newline at end of file
+def requires_auth(permission='', any_of=None, all_of=None):
+    return authenticator.requires_auth(permission, any_of=any_of,
+                                       all_of=all_of)
@@ -1,5 +1,6 @@
 import os
-from sqlalchemy import Column, String, Integer
+from functools import lru_cache
+from sqlalchemy import Column, String, Integer, event
 from flask_sqlalchemy import SQLAlchemy
 import json
 
@@ -9,6 +10,9 @@ database_path = "sqlite:///{}".format(os.path.join(project_dir, database_filenam
 
 db = SQLAlchemy()
 
+# parsed recipes kept across requests, keyed by the recipe blob
+PARSED_RECIPE_CACHE_SIZE = 16384
+
 '''
 setup_db(app)
     binds a flask application and a SQLAlchemy service
@@ -29,6 +33,18 @@ def db_drop_and_create_all():
     db.drop_all()
     db.create_all()
 
+'''
+parse_recipe(recipe)
+    parses a recipe blob into its long and short forms
+    results are shared by every drink with the same blob, across requests,
+    so they must not be modified
+'''
+@lru_cache(maxsize=PARSED_RECIPE_CACHE_SIZE)
+def parse_recipe(recipe):
+    parsed = json.loads(recipe)
+    short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in parsed]
+    return parsed, short_recipe
+
 '''
 Drink
 a persistent drink entity, extends the base SQLAlchemy Model
@@ -42,17 +58,30 @@ class Drink(db.Model):
     # the required datatype is [{'color': string, 'name':string, 'parts':number}]
     recipe =  Column(String(180), nullable=False)
 
+    '''
+    parsed_recipe()
+        the recipe blob parsed once per instance, and its short form
+        returns a (recipe, parsed, short_recipe) tuple
+        assigning recipe drops it, see drop_parsed_recipe() below, and a
+        recipe reloaded from the database with a new value is parsed again
+    '''
+    def parsed_recipe(self):
+        recipe = self.recipe
+        cached = self.__dict__.get('_parsed_recipe')
+        if cached is None or cached[0] is not recipe:
+            cached = (recipe,) + parse_recipe(recipe)
+            self._parsed_recipe = cached
+        return cached
+
     '''
     short()
         short form representation of the Drink model
     '''
     def short(self):
-        print(json.loads(self.recipe))
-        short_recipe = [{'color': r['color'], 'parts': r['parts']} for r in json.loads(self.recipe)]
         return {
             'id': self.id,
             'title': self.title,
-            'recipe': short_recipe
+            'recipe': self.parsed_recipe()[2]
         }
 
     '''
@@ -63,7 +92,7 @@ class Drink(db.Model):
         return {
             'id': self.id,
             'title': self.title,
-            'recipe': json.loads(self.recipe)
+            'recipe': self.parsed_recipe()[1]
         }
 
     '''
@@ -104,4 +133,12 @@ class Drink(db.Model):
         db.session.commit()
 
     def __repr__(self):
-        return json.dumps(self.short())
\ No newline at end of file
+        return json.dumps(self.short())
+
+'''
+drop_parsed_recipe()
+    forgets the parsed recipe of a drink whenever recipe is assigned
+'''
+@event.listens_for(Drink.recipe, 'set')
+def drop_parsed_recipe(target, value, oldvalue, initiator):
+    target.__dict__.pop('_parsed_recipe', None)